@@ -15,8 +15,12 @@ from src.config import (
     HEALTHCHECK_PORT,
     require_token,
 )
+from src.utils import backup, db, mojang, perf, rcon
 from src.utils.health import make_status_func, start_health_server
 from src.utils.logger import setup_logging
+from src.utils.players import flush_players
+from src.utils.store import flush_whitelist
+from src.utils.wl_migrate import backfill_uuids
 
 
 async def load_cogs(bot: commands.Bot) -> None:
@@ -26,6 +30,7 @@ async def load_cogs(bot: commands.Bot) -> None:
         "src.cogs.admin",
         "src.cogs.minecraft",
         "src.cogs.management",
+        "src.cogs.backups",
         "src.cogs.onboarding",
         "src.cogs.moderation",
     ):
@@ -37,23 +42,56 @@ async def load_cogs(bot: commands.Bot) -> None:
 
 
 class AethorBot(commands.Bot):
+    check_only = False  # --check: validate setup without listening on ports or keeping connections open
+
     async def setup_hook(self) -> None:
+        await db.attach()
+        # Refuses to start on a corrupt data file that no backup can replace
+        backup.load_stores()
+        # Offline part of the UUID migration: cheap, and a no-op once every entry has a UUID
+        await backfill_uuids()
         await load_cogs(self)
         # Start healthcheck server after cogs load
-        if HEALTHCHECK_ENABLED:
+        if HEALTHCHECK_ENABLED and not self.check_only:
             started_at = getattr(self, "_started_at", time.time())
             self._started_at = started_at
             try:
-                start_health_server(HEALTHCHECK_PORT, make_status_func(self, started_at))
+                self._health_runner = await start_health_server(HEALTHCHECK_PORT, make_status_func(self, started_at))
                 logging.getLogger("Aethor").info(f"Healthcheck server listening on :{HEALTHCHECK_PORT}")
             except Exception as e:
                 logging.getLogger("Aethor").warning(f"Failed to start healthcheck server: {e}")
 
+    async def smoke_check(self) -> None:
+        """Run setup_hook for --check, then release what it opened (storage engine, HTTP sessions)."""
+        self.check_only = True
+        try:
+            await self.setup_hook()
+        finally:
+            await rcon.close()
+            await mojang.close()
+            await db.close()
+
+    async def close(self) -> None:
+        runner = getattr(self, "_health_runner", None)
+        if runner is not None:
+            await runner.cleanup()
+        await rcon.close()
+        await mojang.close()
+        flush_whitelist()
+        flush_players()
+        await db.close()
+        await super().close()
+
 
 def build_bot() -> commands.Bot:
     intents = discord.Intents.default()
     intents.message_content = True  # for prefix commands
-    bot = AethorBot(command_prefix="!", intents=intents, application_id=APPLICATION_ID)
+    bot = AethorBot(
+        command_prefix="!", intents=intents, application_id=APPLICATION_ID, tree_cls=perf.InstrumentedTree
+    )
+    perf.instrument_http(bot.http)
+    bot.before_invoke(perf.before_prefix_command)
+    bot.after_invoke(perf.after_prefix_command)
     return bot
 
 
@@ -71,7 +109,7 @@ def main() -> None:
     if args.check:
         # Load extensions in an async context to validate without running the bot
         try:
-            asyncio.run(bot.setup_hook())
+            asyncio.run(bot.smoke_check())
             logger.info("Smoke-check complete: config imported and cogs loaded.")
             sys.exit(0)
         except Exception as e:
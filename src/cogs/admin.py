@@ -3,6 +3,7 @@ from discord import app_commands
 from discord.ext import commands
 
 from src.config import ADMIN_ROLE_IDS, GUILD_ID
+from src.utils import perf
 
 
 def user_is_admin(ctx_or_interaction) -> bool:
@@ -79,6 +80,26 @@ class Admin(commands.Cog):
         except Exception as e:
             await interaction.response.send_message(f"Failed to sync: {e}", ephemeral=True)
 
+    @app_commands.command(name="perfstats", description="Show command and dependency latency since startup")
+    @app_commands.default_permissions(administrator=True)
+    async def perfstats_slash(self, interaction: discord.Interaction):
+        if not user_is_admin(interaction):
+            await interaction.response.send_message("Insufficient permissions.", ephemeral=True)
+            return
+        rows = perf.summary()
+        if not rows:
+            await interaction.response.send_message("No timings recorded yet.", ephemeral=True)
+            return
+        lines = [f"{'name':<22} {'count':>6} {'err':>4} {'busy':>4} {'p50':>7} {'p95':>7} {'max':>7}"]
+        for row in rows[:25]:
+            # p95 above ~2.5s means the command is at risk of missing the 3s interaction deadline
+            flag = " !" if row["group"] == "command" and row["p95"] >= 2.5 else ""
+            lines.append(
+                f"{row['name'][:22]:<22} {row['count']:>6} {row['errors']:>4} {row['inflight']:>4} "
+                f"{row['p50'] * 1000:>5.0f}ms {row['p95'] * 1000:>5.0f}ms {row['max'] * 1000:>5.0f}ms{flag}"
+            )
+        await interaction.response.send_message("```\n" + "\n".join(lines) + "\n```", ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Admin(bot))
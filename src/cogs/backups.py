@@ -0,0 +1,118 @@
+import datetime
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from src.utils import backup
+
+
+def _describe(snapshot: dict) -> str:
+    created = datetime.datetime.fromisoformat(snapshot["created_at"]).strftime("%Y-%m-%d %H:%M")
+    counts = snapshot.get("counts") or {}
+    reason = f" ({snapshot['reason']})" if snapshot.get("reason") else ""
+    names, links = counts.get("whitelist", "?"), counts.get("players", "?")
+    return f"`{snapshot['id']}` {created}{reason}: {names} names, {links} links"
+
+
+def _section(title: str, items: list[str], limit: int = 20) -> str:
+    more = f" … (+{len(items) - limit})" if len(items) > limit else ""
+    return f"{title} ({len(items)}): " + (", ".join(items[:limit]) + more if items else "—")
+
+
+class Backups(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def _backup_autocomplete(self, interaction: discord.Interaction, current: str):
+        snapshots = reversed(backup.list_backups())
+        return [
+            app_commands.Choice(name=_describe(s).replace("`", "")[:100], value=s["id"])
+            for s in snapshots
+            if s["id"].startswith(current)
+        ][:25]
+
+    @app_commands.command(name="backup_list", description="List recent whitelist/player backups")
+    @app_commands.default_permissions(administrator=True)
+    async def backup_list_slash(self, interaction: discord.Interaction):
+        snapshots = backup.list_backups()
+        if not snapshots:
+            await interaction.response.send_message("No backups yet.", ephemeral=True)
+            return
+        lines = [_describe(s) for s in reversed(snapshots[-15:])]
+        await interaction.response.send_message(
+            f"Backups ({len(snapshots)} total, newest first):\n" + "\n".join(lines), ephemeral=True
+        )
+
+    @app_commands.command(name="backup_now", description="Take a backup of the whitelist and player links now")
+    @app_commands.default_permissions(administrator=True)
+    async def backup_now_slash(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        snapshot = await backup.create_backup(f"manual by {interaction.user}")
+        if snapshot is None:
+            msg = "Nothing changed since the last backup (or backups are disabled)."
+            await interaction.followup.send(msg, ephemeral=True)
+            return
+        await interaction.followup.send("Backup created: " + _describe(snapshot), ephemeral=True)
+
+    @app_commands.command(name="backup_diff", description="Compare two backups, or a backup against the live data")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(older="Backup id (or 'latest')", newer="Backup id, or 'live' for the current data")
+    @app_commands.autocomplete(older=_backup_autocomplete, newer=_backup_autocomplete)
+    async def backup_diff_slash(self, interaction: discord.Interaction, older: str, newer: str = "live"):
+        old_snap = backup.find_backup(older)
+        new_snap = None if newer == "live" else backup.find_backup(newer)
+        if old_snap is None or (newer != "live" and new_snap is None):
+            await interaction.response.send_message("Backup not found (use an id from /backup_list).", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        old_files = await backup.load_backup(old_snap)
+        new_files = backup.live_files() if new_snap is None else await backup.load_backup(new_snap)
+        diff = backup.diff_files(old_files, new_files)
+        lines = [
+            f"Diff `{old_snap['id']}` → {'live' if new_snap is None else '`' + new_snap['id'] + '`'}",
+            _section("Whitelist added", diff["whitelist_added"]),
+            _section("Whitelist removed", diff["whitelist_removed"]),
+            _section("Links added", diff["players_added"], 10),
+            _section("Links removed", diff["players_removed"], 10),
+            _section("Links changed", diff["players_changed"], 10),
+        ]
+        await interaction.followup.send("\n".join(lines)[:1990], ephemeral=True)
+
+    @app_commands.command(name="backup_restore", description="Restore the whitelist and/or player links from a backup")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(backup_id="Backup id (or 'latest')", target="What to restore")
+    @app_commands.choices(
+        target=[
+            app_commands.Choice(name="Whitelist and player links", value="both"),
+            app_commands.Choice(name="Whitelist only", value="whitelist"),
+            app_commands.Choice(name="Player links only", value="players"),
+        ]
+    )
+    @app_commands.autocomplete(backup_id=_backup_autocomplete)
+    async def backup_restore_slash(
+        self, interaction: discord.Interaction, backup_id: str, target: app_commands.Choice[str] | None = None
+    ):
+        snapshot = backup.find_backup(backup_id)
+        if snapshot is None:
+            await interaction.response.send_message("Backup not found (use an id from /backup_list).", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        value = target.value if target else "both"
+        targets = ("whitelist", "players") if value == "both" else (value,)
+        try:
+            restored, undo = await backup.restore_backup(snapshot, targets)
+        except Exception as e:
+            await interaction.followup.send(f"Restore failed: {e}", ephemeral=True)
+            return
+        parts = [f"{count} {name} entries" for name, count in restored.items()]
+        note = "\nRun /whitelist_sync to push the restored whitelist to the server." if "whitelist" in restored else ""
+        await interaction.followup.send(
+            f"Restored {', '.join(parts)} from `{snapshot['id']}`. "
+            f"The previous state was backed up as `{undo['id']}`.{note}",
+            ephemeral=True,
+        )
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Backups(bot))
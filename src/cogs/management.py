@@ -1,8 +1,8 @@
-import csv
+import asyncio
 import datetime
 import io
 import json
-import re
+import random
 
 import discord
 from discord import app_commands
@@ -11,26 +11,98 @@ from discord.ext import commands, tasks
 from src.config import (
     AUTO_SYNC_ENABLED,
     AUTO_SYNC_HOUR,
+    AUTO_SYNC_INTERVAL_MINUTES,
+    AUTO_SYNC_JITTER_SECONDS,
+    AUTO_SYNC_MAX_CHANGES_PER_TICK,
     AUTO_SYNC_MINUTE,
+    AUTO_SYNC_MODE,
+    AUTO_SYNC_NIGHTLY_FULL,
     AUTO_SYNC_REMOVE_EXTRAS,
     LOG_CHANNEL_ID,
     SYNC_COOLDOWN_SECONDS,
 )
-from src.utils import rcon
-from src.utils.backup import backup_whitelist
+from src.utils import rcon, server_wl, server_wl_file
+from src.utils.backup import create_backup
+from src.utils.mojang import fetch_uuids_bulk
+from src.utils.pagination import NamePaginator, static_source
 from src.utils.store import (
+    add_many_to_whitelist,
     add_to_whitelist,
     read_whitelist,
     remove_from_whitelist,
+    whitelist_count,
+    whitelist_uuid,
+    whitelist_view,
 )
+from src.utils.wl_import import iter_attachment, parse_stream
+from src.utils.wl_sync import SyncReport, apply_changes
+
+# One sync at a time: the nightly pass, interval passes, manual syncs and imports all diff then apply, and two
+# overlapping runs would send the same adds/removes twice
+_sync_lock = asyncio.Lock()
+
+
+class _ImportProgress:
+    """Edits the deferred reply with the latest progress text, at most every couple of seconds."""
+
+    INTERVAL = 2.0
+
+    def __init__(self, interaction: discord.Interaction):
+        self.interaction = interaction
+        self.text: str | None = None
+        self._shown: str | None = None
+        self._task: asyncio.Task | None = None
+
+    def update(self, text: str) -> None:
+        self.text = text
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.INTERVAL)
+            if self.text is not None and self.text != self._shown:
+                self._shown = self.text
+                try:
+                    await self.interaction.edit_original_response(content=self.text)
+                except Exception:
+                    pass
+
+    async def finish(self, text: str) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self.text = self._shown = text
+        await self.interaction.edit_original_response(content=text)
+
+    async def __aenter__(self) -> "_ImportProgress":
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+_NO_SERVER_SOURCE = "RCON not enabled and no SERVER_WHITELIST_FILE configured."
 
 
 class Management(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         if AUTO_SYNC_ENABLED:
-            self.auto_sync_loop.start()
+            if AUTO_SYNC_MODE == "interval":
+                self.incremental_sync_loop.start()
+            if AUTO_SYNC_MODE != "interval" or AUTO_SYNC_NIGHTLY_FULL:
+                self.auto_sync_loop.start()
         self._sync_last: dict[int, datetime.datetime] = {}
+        self._sync_backlog = False  # the last incremental pass hit its cap and left changes for the next one
+        self._wl_watch: asyncio.Task | None = None
+        if server_wl_file.is_enabled():
+            self._wl_watch = asyncio.get_running_loop().create_task(server_wl.watch())
+
+    async def cog_unload(self) -> None:
+        self.auto_sync_loop.cancel()
+        self.incremental_sync_loop.cancel()
+        if self._wl_watch is not None:
+            self._wl_watch.cancel()
 
     def _cooldown_remaining(self, user_id: int) -> int:
         last = self._sync_last.get(user_id)
@@ -40,6 +112,58 @@ class Management(commands.Cog):
         remaining = SYNC_COOLDOWN_SECONDS - int(delta.total_seconds())
         return remaining if remaining > 0 else 0
 
+    @staticmethod
+    def _sync_summary(report: SyncReport, pending: int, remove_extras: bool) -> list[str]:
+        summary = [
+            f"Added: {report.added} (pending: {pending})",
+            f"Removed: {report.removed}{' (extras only)' if remove_extras else ''}",
+        ]
+        if report.add_errors:
+            summary.append("Add errors: " + "; ".join(report.add_errors[:5]))
+        if report.remove_errors:
+            summary.append("Remove errors: " + "; ".join(report.remove_errors[:5]))
+        return summary
+
+    @staticmethod
+    def _note_sync(report: SyncReport) -> None:
+        if not report.add_errors and not report.remove_errors:
+            server_wl.get_cache().mark_synced()
+
+    @staticmethod
+    def _diff_lines(cache: server_wl.ServerWhitelist) -> list[str]:
+        to_add, to_remove = cache.diff()
+        return [
+            f"Would add ({len(to_add)}): " + ", ".join(to_add[:20]),
+            f"Would remove ({len(to_remove)}): " + ", ".join(to_remove[:20]),
+            f"(server list read {int(cache.age or 0)}s ago)",
+        ]
+
+    async def _status_lines(self) -> list[str]:
+        local_count = whitelist_count()
+        server_count = "N/A"
+        pending = ""
+        if server_wl.is_available():
+            cache = server_wl.get_cache()
+            try:
+                # Only the very first status pays for a listing; afterwards the cached copy answers
+                if not cache.loaded:
+                    await cache.refresh()
+                to_add, to_remove = cache.diff()
+                source = "whitelist.json" if server_wl_file.is_enabled() else "RCON"
+                server_count = f"{len(cache)} (from {source}, {int(cache.age or 0)}s ago)"
+                pending = f"Pending sync: +{len(to_add)} / -{len(to_remove)}"
+            except Exception:
+                server_count = "error"
+        lines = [
+            f"RCON: {'enabled' if rcon.is_enabled() else 'disabled'}",
+            f"Next auto-sync: {self._next_sync_text()}",
+            f"Local whitelist: {local_count}",
+            f"Server whitelist: {server_count}",
+        ]
+        if pending:
+            lines.append(pending)
+        return lines
+
     # Role management (prefix)
     @commands.command(name="rolegrant")
     @commands.has_permissions(administrator=True)
@@ -96,7 +220,7 @@ class Management(commands.Cog):
         msg = f"Added `{name}` to whitelist." if ok else f"`{name}` already in whitelist or invalid."
         if ok and rcon.is_enabled():
             try:
-                r = rcon.whitelist_add(name)
+                r = await server_wl.whitelist_add(name)
                 msg += f"\nRCON: {r}"
             except Exception as e:
                 msg += f"\nRCON failed: {e}"
@@ -109,7 +233,7 @@ class Management(commands.Cog):
         msg = f"Removed `{name}` from whitelist." if ok else f"`{name}` not found in whitelist."
         if ok and rcon.is_enabled():
             try:
-                r = rcon.whitelist_remove(name)
+                r = await server_wl.whitelist_remove(name)
                 msg += f"\nRCON: {r}"
             except Exception as e:
                 msg += f"\nRCON failed: {e}"
@@ -117,13 +241,11 @@ class Management(commands.Cog):
 
     @commands.command(name="wllist")
     @commands.has_permissions(administrator=True)
-    async def wl_list_prefix(self, ctx: commands.Context):
-        wl = read_whitelist()
-        if not wl:
+    async def wl_list_prefix(self, ctx: commands.Context, prefix: str = ""):
+        if not whitelist_count():
             await ctx.reply("Whitelist is empty.")
             return
-        content = "\n".join(wl[:100])
-        await ctx.reply(f"Whitelist ({len(wl)}):\n{content}")
+        await NamePaginator("Whitelist", whitelist_view, ctx.author.id, prefix).reply_to(ctx)
 
     # Whitelist management (slash)
     @app_commands.command(name="whitelist_add", description="Add a Minecraft name to whitelist")
@@ -133,7 +255,7 @@ class Management(commands.Cog):
         msg = f"Added `{name}` to whitelist." if ok else f"`{name}` already in whitelist or invalid."
         if ok and rcon.is_enabled():
             try:
-                r = rcon.whitelist_add(name)
+                r = await server_wl.whitelist_add(name)
                 msg += f"\nRCON: {r}"
             except Exception as e:
                 msg += f"\nRCON failed: {e}"
@@ -146,27 +268,30 @@ class Management(commands.Cog):
         msg = f"Removed `{name}` from whitelist." if ok else f"`{name}` not found in whitelist."
         if ok and rcon.is_enabled():
             try:
-                r = rcon.whitelist_remove(name)
+                r = await server_wl.whitelist_remove(name)
                 msg += f"\nRCON: {r}"
             except Exception as e:
                 msg += f"\nRCON failed: {e}"
         await interaction.response.send_message(msg, ephemeral=True)
 
-    @app_commands.command(name="whitelist_list_server", description="List whitelisted names via RCON")
+    @app_commands.command(name="whitelist_list_server", description="List names on the server whitelist")
     @app_commands.default_permissions(administrator=True)
-    async def wl_list_server_slash(self, interaction: discord.Interaction):
-        if not rcon.is_enabled():
-            await interaction.response.send_message("RCON not enabled.", ephemeral=True)
+    @app_commands.describe(prefix="Only show names starting with this")
+    async def wl_list_server_slash(self, interaction: discord.Interaction, prefix: str = ""):
+        if not server_wl.is_available():
+            await interaction.response.send_message(_NO_SERVER_SOURCE, ephemeral=True)
             return
         try:
-            names = rcon.whitelist_list()
+            names = (await server_wl.refresh()).names()
             if not names:
                 await interaction.response.send_message("Server whitelist is empty.", ephemeral=True)
                 return
-            content = "\n".join(names[:100])
-            await interaction.response.send_message(f"Server whitelist ({len(names)}):\n{content}", ephemeral=True)
         except Exception as e:
-            await interaction.response.send_message(f"RCON failed: {e}", ephemeral=True)
+            await interaction.response.send_message(f"Reading the server whitelist failed: {e}", ephemeral=True)
+            return
+        # Served from the cached server copy; paging and filtering never go back to RCON
+        paginator = NamePaginator("Server whitelist", static_source(names), interaction.user.id, prefix)
+        await paginator.start(interaction)
 
     # Scheduled auto-sync via tasks.loop
     @tasks.loop(time=datetime.time(hour=AUTO_SYNC_HOUR, minute=AUTO_SYNC_MINUTE))
@@ -182,37 +307,29 @@ class Management(commands.Cog):
                         pass
             return
 
-        local = set(read_whitelist())
-        try:
-            server = set(rcon.whitelist_list())
-        except Exception:
-            # Optionally announce error
-            if LOG_CHANNEL_ID:
-                chan = self.bot.get_channel(LOG_CHANNEL_ID)
-                if isinstance(chan, discord.TextChannel):
-                    try:
-                        await chan.send("[Aethor] Nightly whitelist sync failed: unable to fetch server list via RCON.")
-                    except Exception:
-                        pass
-            return
-
-        to_add = sorted(local - server)
-        to_remove = sorted(server - local) if AUTO_SYNC_REMOVE_EXTRAS else []
-
-        added = 0
-        removed = 0
-        for name in to_add:
+        async with _sync_lock:
             try:
-                rcon.whitelist_add(name)
-                added += 1
+                # The daily run always re-reads the server list, catching any drift the cache missed
+                to_add, extras = (await server_wl.refresh(force=True)).diff()
             except Exception:
-                pass
-        for name in to_remove:
-            try:
-                rcon.whitelist_remove(name)
-                removed += 1
-            except Exception:
-                pass
+                # Optionally announce error
+                if LOG_CHANNEL_ID:
+                    chan = self.bot.get_channel(LOG_CHANNEL_ID)
+                    if isinstance(chan, discord.TextChannel):
+                        try:
+                            await chan.send(
+                                "[Aethor] Nightly whitelist sync failed: unable to fetch server list via RCON."
+                            )
+                        except Exception:
+                            pass
+                return
+
+            to_remove = extras if AUTO_SYNC_REMOVE_EXTRAS else []
+
+            report = await apply_changes(to_add, to_remove)
+        self._note_sync(report)
+        added = report.added
+        removed = report.removed
 
         if LOG_CHANNEL_ID:
             chan = self.bot.get_channel(LOG_CHANNEL_ID)
@@ -227,21 +344,70 @@ class Management(commands.Cog):
                     await chan.send(msg)
                 except Exception:
                     pass
-        backup_whitelist()
+        await create_backup("auto-sync")
 
     @auto_sync_loop.before_loop
     async def before_auto_sync(self):
         await self.bot.wait_until_ready()
 
+    # Incremental auto-sync: frequent, capped passes that only touch the server when something changed
+    @tasks.loop(minutes=AUTO_SYNC_INTERVAL_MINUTES)
+    async def incremental_sync_loop(self):
+        if not rcon.is_enabled():
+            return
+        # Spread ticks out so restarts and several bots on one server don't line up
+        await asyncio.sleep(random.uniform(0, max(0.0, AUTO_SYNC_JITTER_SECONDS)))
+        cache = server_wl.get_cache()
+        if cache.loaded and cache.is_fresh() and not cache.dirty and not self._sync_backlog:
+            return  # No local edits, no leftover work and no sign of server drift
+        if _sync_lock.locked():
+            return  # Another sync is running; this tick's work would only duplicate it
+        async with _sync_lock:
+            try:
+                to_add, extras = (await server_wl.refresh()).diff()
+            except Exception:
+                return  # Server unreachable; the next tick tries again
+            to_remove = extras if AUTO_SYNC_REMOVE_EXTRAS else []
+
+            cap = max(1, AUTO_SYNC_MAX_CHANGES_PER_TICK)
+            batch_add = to_add[:cap]
+            batch_remove = to_remove[: cap - len(batch_add)]
+            self._sync_backlog = len(batch_add) + len(batch_remove) < len(to_add) + len(to_remove)
+            if not batch_add and not batch_remove:
+                cache.mark_synced()
+                return
+
+            report = await apply_changes(batch_add, batch_remove)
+        if not self._sync_backlog:
+            self._note_sync(report)
+
+        if LOG_CHANNEL_ID and (report.added or report.removed or report.add_errors or report.remove_errors):
+            chan = self.bot.get_channel(LOG_CHANNEL_ID)
+            if isinstance(chan, discord.TextChannel):
+                left = len(to_add) + len(to_remove) - len(batch_add) - len(batch_remove)
+                msg = f"[Aethor] Whitelist auto-sync: added {report.added}, removed {report.removed}"
+                if report.add_errors or report.remove_errors:
+                    msg += f", {len(report.add_errors) + len(report.remove_errors)} failed"
+                if left:
+                    msg += f" ({left} left for the next pass)"
+                try:
+                    await chan.send(msg)
+                except Exception:
+                    pass
+        await create_backup("auto-sync")
+
+    @incremental_sync_loop.before_loop
+    async def before_incremental_sync(self):
+        await self.bot.wait_until_ready()
+
     @app_commands.command(name="whitelist_list", description="List whitelisted Minecraft names")
     @app_commands.default_permissions(administrator=True)
-    async def wl_list_slash(self, interaction: discord.Interaction):
-        wl = read_whitelist()
-        if not wl:
+    @app_commands.describe(prefix="Only show names starting with this")
+    async def wl_list_slash(self, interaction: discord.Interaction, prefix: str = ""):
+        if not whitelist_count():
             await interaction.response.send_message("Whitelist is empty.", ephemeral=True)
             return
-        content = "\n".join(wl[:100])
-        await interaction.response.send_message(f"Whitelist ({len(wl)}):\n{content}", ephemeral=True)
+        await NamePaginator("Whitelist", whitelist_view, interaction.user.id, prefix).start(interaction)
 
     # Sync local whitelist with server via RCON
     @commands.command(name="wlsync")
@@ -254,43 +420,22 @@ class Management(commands.Cog):
         if not rcon.is_enabled():
             await ctx.reply("RCON not enabled.")
             return
-        local = set(read_whitelist())
-        try:
-            server = set(rcon.whitelist_list())
-        except Exception as e:
-            await ctx.reply(f"RCON failed: {e}")
-            return
-
-        to_add = sorted(local - server)
-        to_remove = sorted(server - local) if remove_extras else []
-
-        added, removed, add_errs, remove_errs = 0, 0, [], []
-        for name in to_add:
+        async with _sync_lock:
             try:
-                rcon.whitelist_add(name)
-                added += 1
+                to_add, extras = (await server_wl.refresh()).diff()
             except Exception as e:
-                add_errs.append(f"{name}: {e}")
+                await ctx.reply(f"RCON failed: {e}")
+                return
 
-        for name in to_remove:
-            try:
-                rcon.whitelist_remove(name)
-                removed += 1
-            except Exception as e:
-                remove_errs.append(f"{name}: {e}")
+            to_remove = extras if remove_extras else []
 
-        summary = [
-            f"Added: {added} (pending: {len(to_add)})",
-            f"Removed: {removed}{' (extras only)' if remove_extras else ''}",
-        ]
-        if add_errs:
-            summary.append("Add errors: " + "; ".join(add_errs[:5]))
-        if remove_errs:
-            summary.append("Remove errors: " + "; ".join(remove_errs[:5]))
+            report = await apply_changes(to_add, to_remove)
+        self._note_sync(report)
+        summary = self._sync_summary(report, len(to_add), remove_extras)
 
         await ctx.reply("Sync complete.\n" + "\n".join(summary))
         self._sync_last[ctx.author.id] = datetime.datetime.now()
-        backup_whitelist()
+        await create_backup("wlsync")
 
         if LOG_CHANNEL_ID:
             chan = self.bot.get_channel(LOG_CHANNEL_ID)
@@ -312,43 +457,23 @@ class Management(commands.Cog):
         if not rcon.is_enabled():
             await interaction.response.send_message("RCON not enabled.", ephemeral=True)
             return
-        local = set(read_whitelist())
-        try:
-            server = set(rcon.whitelist_list())
-        except Exception as e:
-            await interaction.response.send_message(f"RCON failed: {e}", ephemeral=True)
-            return
-
-        to_add = sorted(local - server)
-        to_remove = sorted(server - local) if remove_extras else []
-
-        added, removed, add_errs, remove_errs = 0, 0, [], []
-        for name in to_add:
+        await interaction.response.defer(ephemeral=True)
+        async with _sync_lock:
             try:
-                rcon.whitelist_add(name)
-                added += 1
+                to_add, extras = (await server_wl.refresh()).diff()
             except Exception as e:
-                add_errs.append(f"{name}: {e}")
+                await interaction.followup.send(f"RCON failed: {e}", ephemeral=True)
+                return
 
-        for name in to_remove:
-            try:
-                rcon.whitelist_remove(name)
-                removed += 1
-            except Exception as e:
-                remove_errs.append(f"{name}: {e}")
+            to_remove = extras if remove_extras else []
 
-        summary = [
-            f"Added: {added} (pending: {len(to_add)})",
-            f"Removed: {removed}{' (extras only)' if remove_extras else ''}",
-        ]
-        if add_errs:
-            summary.append("Add errors: " + "; ".join(add_errs[:5]))
-        if remove_errs:
-            summary.append("Remove errors: " + "; ".join(remove_errs[:5]))
+            report = await apply_changes(to_add, to_remove)
+        self._note_sync(report)
+        summary = self._sync_summary(report, len(to_add), remove_extras)
 
-        await interaction.response.send_message("Sync complete.\n" + "\n".join(summary), ephemeral=True)
+        await interaction.followup.send("Sync complete.\n" + "\n".join(summary), ephemeral=True)
         self._sync_last[interaction.user.id] = datetime.datetime.now()
-        backup_whitelist()
+        await create_backup("whitelist_sync")
 
         if LOG_CHANNEL_ID:
             chan = self.bot.get_channel(LOG_CHANNEL_ID)
@@ -364,134 +489,124 @@ class Management(commands.Cog):
     @commands.command(name="wldiff")
     @commands.has_permissions(administrator=True)
     async def wl_diff_prefix(self, ctx: commands.Context):
-        if not rcon.is_enabled():
-            await ctx.reply("RCON not enabled.")
+        if not server_wl.is_available():
+            await ctx.reply(_NO_SERVER_SOURCE)
             return
-        local = set(read_whitelist())
         try:
-            server = set(rcon.whitelist_list())
+            cache = await server_wl.refresh()
         except Exception as e:
-            await ctx.reply(f"RCON failed: {e}")
+            await ctx.reply(f"Reading the server whitelist failed: {e}")
             return
-        to_add = sorted(local - server)
-        to_remove = sorted(server - local)
-        lines = [
-            f"Would add ({len(to_add)}): " + ", ".join(to_add[:20]),
-            f"Would remove ({len(to_remove)}): " + ", ".join(to_remove[:20]),
-        ]
-        await ctx.reply("Diff preview:\n" + "\n".join(lines))
+        await ctx.reply("Diff preview:\n" + "\n".join(self._diff_lines(cache)))
 
     @app_commands.command(name="whitelist_diff", description="Preview local vs server whitelist changes")
     @app_commands.default_permissions(administrator=True)
     async def wl_diff_slash(self, interaction: discord.Interaction):
-        if not rcon.is_enabled():
-            await interaction.response.send_message("RCON not enabled.", ephemeral=True)
+        if not server_wl.is_available():
+            await interaction.response.send_message(_NO_SERVER_SOURCE, ephemeral=True)
             return
-        local = set(read_whitelist())
         try:
-            server = set(rcon.whitelist_list())
+            cache = await server_wl.refresh()
         except Exception as e:
-            await interaction.response.send_message(f"RCON failed: {e}", ephemeral=True)
+            await interaction.response.send_message(f"Reading the server whitelist failed: {e}", ephemeral=True)
             return
-        to_add = sorted(local - server)
-        to_remove = sorted(server - local)
-        lines = [
-            f"Would add ({len(to_add)}): " + ", ".join(to_add[:20]),
-            f"Would remove ({len(to_remove)}): " + ", ".join(to_remove[:20]),
-        ]
-        await interaction.response.send_message("Diff preview:\n" + "\n".join(lines), ephemeral=True)
-
-    # --- Import helpers ---
-    _name_re = re.compile(r"^[A-Za-z0-9_]{3,16}$")
-
-    def _parse_names_from_bytes(self, data: bytes) -> list[str]:
-        # Try UTF-8 with BOM support
-        text = data.decode("utf-8-sig", errors="ignore")
-        names: list[str] = []
-        # If looks like CSV, parse; else splitlines
-        try:
-            sniffer = csv.Sniffer()
-            dialect = sniffer.sniff(text[:1024])
-            reader = csv.reader(io.StringIO(text), dialect)
-            for row in reader:
-                for cell in row:
-                    cell = cell.strip()
-                    if cell:
-                        names.append(cell)
-        except Exception:
-            # Fallback: one name per line, allow commas
-            for line in text.splitlines():
-                for part in line.split(","):
-                    part = part.strip()
-                    if part:
-                        names.append(part)
-        # Normalize and validate
-        out = []
-        seen = set()
-        for n in names:
-            n = n.strip()
-            if not n or n in seen:
-                continue
-            if self._name_re.match(n):
-                seen.add(n)
-                out.append(n)
-        return out
+        await interaction.response.send_message("Diff preview:\n" + "\n".join(self._diff_lines(cache)), ephemeral=True)
 
     @app_commands.command(
         name="whitelist_import", description="Import IGNs from a CSV/TXT attachment; optionally apply via RCON"
     )
     @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(resolve_accounts="Check names against Mojang and store their UUIDs (skips unknown names)")
     async def whitelist_import_slash(
-        self, interaction: discord.Interaction, file: discord.Attachment, apply_rcon: bool = False
+        self,
+        interaction: discord.Interaction,
+        file: discord.Attachment,
+        apply_rcon: bool = False,
+        resolve_accounts: bool = True,
     ):
         await interaction.response.defer(ephemeral=True)
-        # Basic size guard: 5 MB
-        if file.size and file.size > 5 * 1024 * 1024:
+        # Basic size guard: 5 MB (also enforced while streaming, in case the reported size is off)
+        max_bytes = 5 * 1024 * 1024
+        if file.size and file.size > max_bytes:
             await interaction.followup.send("File too large (max 5MB).", ephemeral=True)
             return
-        try:
-            data = await file.read()
-        except Exception as e:
-            await interaction.followup.send(f"Failed to read file: {e}", ephemeral=True)
-            return
-
-        names = self._parse_names_from_bytes(data)
-        if not names:
-            await interaction.followup.send("No valid names found in file.", ephemeral=True)
-            return
 
-        added = 0
-        already = 0
-        for n in names:
-            ok = add_to_whitelist(n)
-            if ok:
-                added += 1
-            else:
-                already += 1
-
-        rcon_applied = 0
-        rcon_skipped = 0
-        if apply_rcon and rcon.is_enabled():
-            for n in names:
-                # Only try to add those that are now present; we don't track per-name add_ok, so attempt anyway
+        async with _ImportProgress(interaction) as progress:
+            total = max(file.size or 0, 1)
+            try:
+                stats = await parse_stream(
+                    iter_attachment(file.url, max_bytes),
+                    lambda st: progress.update(
+                        f"Reading file… {min(100, st.bytes_read * 100 // total)}% ({len(st.names)} names so far)"
+                    ),
+                )
+            except Exception as e:
+                await progress.finish(f"Failed to read file: {e}")
+                return
+            names = stats.names
+            if not names:
+                await progress.finish("No valid names found in file.")
+                return
+            parsed_count = len(names)
+            uuids: dict[str, str] = {}
+            unknown: list[str] = []
+            failed: list[str] = []
+            if resolve_accounts:
+                # Entries that already carry a UUID need no lookup
+                known = {n.lower(): (uuid, n) for n in names if (uuid := whitelist_uuid(n))}
+                pending = [n for n in names if n.lower() not in known]
+                progress.update(f"Resolving {len(pending)} Mojang accounts…")
+                result = await fetch_uuids_bulk(
+                    pending,
+                    on_progress=lambda done, todo: progress.update(f"Resolving Mojang accounts… {done}/{todo}"),
+                )
+                unknown, failed = result.unknown, result.failed
+                resolved = {**result.resolved, **known}
+                # Keep file order and use Mojang's exact casing for resolved names. Only names Mojang says don't exist
+                # are dropped; failed lookups (network, 429) go in without a UUID for backfill_uuids to fill in later
+                skip = {n.lower() for n in unknown}
+                names = [resolved[n.lower()][1] if n.lower() in resolved else n for n in names if n.lower() not in skip]
+                uuids = {exact.lower(): uuid for uuid, exact in resolved.values()}
+
+            # One bulk commit: a single journal append (or one snapshot rewrite for big imports), not a write per name
+            added = len(add_many_to_whitelist(names, uuids))
+            already = len(names) - added
+
+            rcon_applied = 0
+            rcon_skipped = 0
+            if apply_rcon and rcon.is_enabled():
+                progress.update(f"Applying {len(names)} names via RCON…")
                 try:
-                    rcon.whitelist_add(n)
-                    rcon_applied += 1
+                    # Only names the server lacks (by UUID or name); the rest would just be re-adds
+                    wanted = {n.lower() for n in names}
+                    async with _sync_lock:
+                        to_add, _ = (await server_wl.refresh()).diff()
+                        report = await apply_changes([n for n in to_add if n.lower() in wanted])
+                    rcon_applied = report.added
+                    rcon_skipped = len(names) - rcon_applied
                 except Exception:
-                    rcon_skipped += 1
-        elif apply_rcon and not rcon.is_enabled():
-            rcon_skipped = len(names)
-
-        summary = [
-            f"Imported names: {len(names)}",
-            f"Added to local whitelist: {added}",
-            f"Already present: {already}",
-        ]
-        if apply_rcon:
-            summary.append(f"RCON applied: {rcon_applied}; failed/skipped: {rcon_skipped}")
-
-        await interaction.followup.send("Import complete.\n" + "\n".join(summary), ephemeral=True)
-        backup_whitelist()
+                    rcon_skipped = len(names)
+            elif apply_rcon and not rcon.is_enabled():
+                rcon_skipped = len(names)
+
+            summary = [f"Imported names: {parsed_count}"]
+            if stats.invalid or stats.duplicates:
+                summary.append(f"Ignored: {stats.invalid} invalid, {stats.duplicates} duplicate")
+            if resolve_accounts:
+                summary.append(f"Resolved Mojang accounts: {len(uuids)}")
+                if unknown:
+                    summary.append(f"Unknown accounts (skipped): {len(unknown)}: " + ", ".join(unknown[:10]))
+                if failed:
+                    summary.append(f"Lookup failed (added without UUID): {len(failed)}")
+            summary += [
+                f"Added to local whitelist: {added}",
+                f"Already present: {already}",
+            ]
+            if apply_rcon:
+                summary.append(f"RCON applied: {rcon_applied}; failed/skipped: {rcon_skipped}")
+
+            await progress.finish("Import complete.\n" + "\n".join(summary))
+        await create_backup("whitelist_import")
 
         if LOG_CHANNEL_ID:
             chan = self.bot.get_channel(LOG_CHANNEL_ID)
@@ -526,44 +641,30 @@ class Management(commands.Cog):
     def _next_sync_text(self) -> str:
         if not AUTO_SYNC_ENABLED:
             return "disabled"
+        if AUTO_SYNC_MODE == "interval":
+            text = f"every {AUTO_SYNC_INTERVAL_MINUTES:g} min"
+            next_tick = self.incremental_sync_loop.next_iteration
+            if next_tick is not None:
+                text += f" (next ~{next_tick.astimezone().strftime('%H:%M')})"
+            if not AUTO_SYNC_NIGHTLY_FULL:
+                return text
+            text += ", full pass "
+        else:
+            text = ""
         now = datetime.datetime.now()
         target = now.replace(hour=AUTO_SYNC_HOUR, minute=AUTO_SYNC_MINUTE, second=0, microsecond=0)
         if target <= now:
             target = target + datetime.timedelta(days=1)
-        return target.strftime("%Y-%m-%d %H:%M")
+        return text + target.strftime("%Y-%m-%d %H:%M")
 
     @commands.command(name="status")
     async def status_prefix(self, ctx: commands.Context):
-        local_count = len(read_whitelist())
-        server_count = "N/A"
-        if rcon.is_enabled():
-            try:
-                server_count = str(len(rcon.whitelist_list()))
-            except Exception:
-                server_count = "error"
-        lines = [
-            f"RCON: {'enabled' if rcon.is_enabled() else 'disabled'}",
-            f"Next auto-sync: {self._next_sync_text()}",
-            f"Local whitelist: {local_count}",
-            f"Server whitelist: {server_count}",
-        ]
+        lines = await self._status_lines()
         await ctx.reply("Status:\n" + "\n".join(lines))
 
     @app_commands.command(name="status", description="Show bot status (RCON, sync time, whitelist counts)")
     async def status_slash(self, interaction: discord.Interaction):
-        local_count = len(read_whitelist())
-        server_count = "N/A"
-        if rcon.is_enabled():
-            try:
-                server_count = str(len(rcon.whitelist_list()))
-            except Exception:
-                server_count = "error"
-        lines = [
-            f"RCON: {'enabled' if rcon.is_enabled() else 'disabled'}",
-            f"Next auto-sync: {self._next_sync_text()}",
-            f"Local whitelist: {local_count}",
-            f"Server whitelist: {server_count}",
-        ]
+        lines = await self._status_lines()
         await interaction.response.send_message("Status:\n" + "\n".join(lines), ephemeral=True)
 
 
@@ -1,20 +1,61 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
-from mcstatus import JavaServer
+from discord.ext import commands, tasks
 
-from src.config import MC_SERVER
+from src.config import MC_SERVER, MC_STATUS_POLL_SECONDS, PRESENCE_POLL_SECONDS
+from src.utils import mc_status, rcon
+from src.utils.mc_online import poll_presence
 
 
-async def query_status(address: str):
-    server = JavaServer.lookup(address)
-    status = await server.async_status()
-    return status
+def _status_embed(addr: str, snapshot: mc_status.StatusSnapshot) -> discord.Embed:
+    status = snapshot.status
+    embed = discord.Embed(title="Minecraft Server Status", color=0x00AAFF)
+    embed.add_field(name="Address", value=addr, inline=True)
+    embed.add_field(name="Players", value=f"{status.players.online}", inline=True)
+    embed.add_field(name="Latency", value=f"{round(status.latency)}ms", inline=True)
+    footer = f"Updated {int(snapshot.age)}s ago"
+    if snapshot.error:
+        footer += " (latest check failed)"
+    embed.set_footer(text=footer)
+    return embed
 
 
 class Minecraft(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        if mc_status.tracked_addresses():
+            self.status_poll_loop.start()
+        if rcon.is_enabled() or MC_SERVER:
+            self.presence_poll_loop.start()
+
+    async def cog_unload(self) -> None:
+        self.status_poll_loop.cancel()
+        self.presence_poll_loop.cancel()
+
+    # Presence tracker: other cogs can listen for on_mc_player_join / on_mc_player_leave (name: str)
+    @tasks.loop(seconds=PRESENCE_POLL_SECONDS)
+    async def presence_poll_loop(self):
+        changes = await poll_presence()
+        if changes is None:
+            return
+        joined, left = changes
+        for name in joined:
+            self.bot.dispatch("mc_player_join", name)
+        for name in left:
+            self.bot.dispatch("mc_player_leave", name)
+
+    @presence_poll_loop.before_loop
+    async def before_presence_poll(self):
+        await self.bot.wait_until_ready()
+
+    # Background poller: one ping per tracked address per interval, shared by every /mcstatus
+    @tasks.loop(seconds=MC_STATUS_POLL_SECONDS)
+    async def status_poll_loop(self):
+        await mc_status.refresh_all()
+
+    @status_poll_loop.before_loop
+    async def before_status_poll(self):
+        await self.bot.wait_until_ready()
 
     @commands.command(name="mcstatus")
     async def mcstatus_prefix(self, ctx: commands.Context, address: str = ""):
@@ -23,12 +64,10 @@ class Minecraft(commands.Cog):
             await ctx.reply("No server provided. Set `MC_SERVER` or pass an address.")
             return
         try:
-            status = await query_status(addr)
-            embed = discord.Embed(title="Minecraft Server Status", color=0x00AAFF)
-            embed.add_field(name="Address", value=addr, inline=True)
-            embed.add_field(name="Players", value=f"{status.players.online}", inline=True)
-            embed.add_field(name="Latency", value=f"{round(status.latency)}ms", inline=True)
-            await ctx.reply(embed=embed)
+            snapshot = await mc_status.get_status(addr)
+            if snapshot.status is None:
+                raise RuntimeError(snapshot.error)
+            await ctx.reply(embed=_status_embed(addr, snapshot))
         except Exception as e:
             await ctx.reply(f"Failed to query status: {e}")
 
@@ -42,12 +81,10 @@ class Minecraft(commands.Cog):
             )
             return
         try:
-            status = await query_status(addr)
-            embed = discord.Embed(title="Minecraft Server Status", color=0x00AAFF)
-            embed.add_field(name="Address", value=addr, inline=True)
-            embed.add_field(name="Players", value=f"{status.players.online}", inline=True)
-            embed.add_field(name="Latency", value=f"{round(status.latency)}ms", inline=True)
-            await interaction.response.send_message(embed=embed)
+            snapshot = await mc_status.get_status(addr)
+            if snapshot.status is None:
+                raise RuntimeError(snapshot.error)
+            await interaction.response.send_message(embed=_status_embed(addr, snapshot))
         except Exception as e:
             await interaction.response.send_message(f"Failed to query status: {e}", ephemeral=True)
 
@@ -1,37 +1,70 @@
+import re
+
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
-from src.config import VERIFIED_ROLE_ID, VERIFY_LOG_CHANNEL_ID
-from src.utils import rcon
+from src.config import IGN_REFRESH_ENABLED, IGN_REFRESH_INTERVAL_SECONDS, VERIFIED_ROLE_ID, VERIFY_LOG_CHANNEL_ID
+from src.utils import ign_refresh, rcon, server_wl
 from src.utils.mc_online import is_player_online
 from src.utils.mojang import fetch_uuid
-from src.utils.players import delete_player, get_player, set_player
+from src.utils.players import delete_player, find_by_name, find_by_uuid, get_player, set_player
 from src.utils.store import add_to_whitelist, remove_from_whitelist
 
+_uuid_re = re.compile(r"^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$")
+
 
 class Onboarding(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        if IGN_REFRESH_ENABLED:
+            self.ign_refresh_loop.start()
+
+    async def cog_unload(self) -> None:
+        self.ign_refresh_loop.cancel()
+
+    # Keeps linked names current after players rename; progress is checkpointed, so restarts resume mid-pass
+    @tasks.loop(seconds=IGN_REFRESH_INTERVAL_SECONDS)
+    async def ign_refresh_loop(self):
+        try:
+            await ign_refresh.run_batch()
+        except Exception as e:
+            ign_refresh.logger.warning(f"IGN refresh batch failed: {e}")
+
+    @ign_refresh_loop.before_loop
+    async def before_ign_refresh(self):
+        await self.bot.wait_until_ready()
 
     @app_commands.command(name="verify", description="Link your Minecraft name and get verified")
     @app_commands.describe(name="Your Minecraft in-game name")
     async def verify_slash(self, interaction: discord.Interaction, name: str):
         await interaction.response.defer(ephemeral=True)
-        uuid, exact = await fetch_uuid(name)
+        try:
+            uuid, exact = await fetch_uuid(name)
+        except Exception as e:
+            await interaction.followup.send(f"Could not reach Mojang to check that name: {e}", ephemeral=True)
+            return
         if not uuid:
             await interaction.followup.send("Could not find that Minecraft name. Check spelling.", ephemeral=True)
             return
         mc_name = exact or name
+        owner = find_by_uuid(uuid)
+        if owner and owner.discord_id != str(interaction.user.id):
+            await interaction.followup.send(
+                f"{mc_name} is already linked to another Discord account. Ask an admin if this is a mistake.",
+                ephemeral=True,
+            )
+            return
         set_player(interaction.user.id, mc_name, uuid)
 
-        added = add_to_whitelist(mc_name)
+        # With the UUID, a renamed player's existing entry is renamed rather than duplicated
+        added = add_to_whitelist(mc_name, uuid)
         msg = f"Linked {mc_name} (UUID: {uuid}). "
         msg += "Added to whitelist. " if added else "Already on whitelist. "
 
         if rcon.is_enabled() and added:
             try:
-                r = rcon.whitelist_add(mc_name)
+                r = await server_wl.whitelist_add(mc_name)
                 msg += f"RCON: {r} "
             except Exception as e:
                 msg += f"RCON failed: {e} "
@@ -55,9 +88,21 @@ class Onboarding(commands.Cog):
 
         await interaction.followup.send(msg.strip(), ephemeral=True)
 
-    @app_commands.command(name="whois", description="Look up a user's linked Minecraft account")
-    @app_commands.describe(user="Discord user to look up")
-    async def whois_slash(self, interaction: discord.Interaction, user: discord.User | None = None):
+    @app_commands.command(name="whois", description="Look up a linked Minecraft account by user, IGN or UUID")
+    @app_commands.describe(user="Discord user to look up", query="Minecraft name or UUID to look up")
+    async def whois_slash(
+        self, interaction: discord.Interaction, user: discord.User | None = None, query: str | None = None
+    ):
+        if query and not user:
+            query = query.strip()
+            record = find_by_uuid(query) if _uuid_re.match(query) else find_by_name(query)
+            if not record:
+                await interaction.response.send_message(f"No Discord account is linked to `{query}`.", ephemeral=True)
+                return
+            await interaction.response.send_message(
+                f"<@{record.discord_id}>: {record.name} (UUID: {record.uuid})", ephemeral=True
+            )
+            return
         target = user or interaction.user
         record = get_player(target.id)
         if not record:
@@ -90,7 +135,7 @@ class Onboarding(commands.Cog):
             removed_msg = "Removed from whitelist. " if removed else "Not found on whitelist. "
             if removed and rcon.is_enabled():
                 try:
-                    r = rcon.whitelist_remove(mc_name)
+                    r = await server_wl.whitelist_remove(mc_name)
                     removed_msg += f"RCON: {r} "
                 except Exception as e:
                     removed_msg += f"RCON failed: {e} "
@@ -140,7 +185,7 @@ class Onboarding(commands.Cog):
             removed_msg = f"Removed {mc_name} from whitelist. " if removed else f"{mc_name} not on whitelist. "
             if removed and rcon.is_enabled():
                 try:
-                    r = rcon.whitelist_remove(mc_name)
+                    r = await server_wl.whitelist_remove(mc_name)
                     removed_msg += f"RCON: {r} "
                 except Exception as e:
                     removed_msg += f"RCON failed: {e} "
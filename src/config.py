@@ -22,6 +22,29 @@ except ValueError:
 ADMIN_ROLE_IDS: list[int] = [int(x) for x in os.getenv("ADMIN_ROLE_IDS", "").split(",") if x.strip().isdigit()]
 
 MC_SERVER: str = os.getenv("MC_SERVER", "")
+try:
+    PRESENCE_POLL_SECONDS: float = float(os.getenv("PRESENCE_POLL_SECONDS", "15"))
+except ValueError:
+    PRESENCE_POLL_SECONDS = 15.0
+# Extra addresses the status poller keeps fresh alongside MC_SERVER (comma-separated)
+MC_STATUS_ADDRESSES: list[str] = [x.strip() for x in os.getenv("MC_STATUS_ADDRESSES", "").split(",") if x.strip()]
+try:
+    MC_STATUS_POLL_SECONDS: float = float(os.getenv("MC_STATUS_POLL_SECONDS", "30"))
+except ValueError:
+    MC_STATUS_POLL_SECONDS = 30.0
+try:
+    MC_STATUS_MAX_AGE_SECONDS: float = float(os.getenv("MC_STATUS_MAX_AGE_SECONDS", str(MC_STATUS_POLL_SECONDS * 2)))
+except ValueError:
+    MC_STATUS_MAX_AGE_SECONDS = MC_STATUS_POLL_SECONDS * 2
+# Bounds applied to DNS record TTLs when caching resolved server addresses
+try:
+    DNS_MIN_TTL_SECONDS: float = float(os.getenv("DNS_MIN_TTL_SECONDS", "30"))
+except ValueError:
+    DNS_MIN_TTL_SECONDS = 30.0
+try:
+    DNS_MAX_TTL_SECONDS: float = float(os.getenv("DNS_MAX_TTL_SECONDS", "3600"))
+except ValueError:
+    DNS_MAX_TTL_SECONDS = 3600.0
 
 
 def require_token() -> None:
@@ -43,6 +66,25 @@ try:
 except ValueError:
     RCON_PORT = 25575
 RCON_PASSWORD: str = os.getenv("RCON_PASSWORD", "")
+try:
+    RCON_POOL_SIZE: int = int(os.getenv("RCON_POOL_SIZE", "2"))
+except ValueError:
+    RCON_POOL_SIZE = 2
+try:
+    RCON_TIMEOUT_SECONDS: float = float(os.getenv("RCON_TIMEOUT_SECONDS", "10"))
+except ValueError:
+    RCON_TIMEOUT_SECONDS = 10.0
+# Commands in flight on one connection during bulk syncs. 1 (default) waits for each reply before sending the
+# next, which is all vanilla/Paper RCON can handle; larger values pipeline and are only for stream-based servers
+try:
+    RCON_PIPELINE_WINDOW: int = int(os.getenv("RCON_PIPELINE_WINDOW", "1"))
+except ValueError:
+    RCON_PIPELINE_WINDOW = 1
+try:
+    # Bulk sync rate cap (commands per second) to protect server TPS; 0 disables the cap
+    RCON_MAX_COMMANDS_PER_SECOND: float = float(os.getenv("RCON_MAX_COMMANDS_PER_SECOND", "50"))
+except ValueError:
+    RCON_MAX_COMMANDS_PER_SECOND = 50.0
 
 # Auto sync configuration
 AUTO_SYNC_ENABLED: bool = _get_bool(os.getenv("AUTO_SYNC_ENABLED", "false"))
@@ -55,6 +97,22 @@ try:
 except ValueError:
     AUTO_SYNC_MINUTE = 0
 AUTO_SYNC_REMOVE_EXTRAS: bool = _get_bool(os.getenv("AUTO_SYNC_REMOVE_EXTRAS", "false"))
+# "daily": one full pass at AUTO_SYNC_HOUR:AUTO_SYNC_MINUTE. "interval": small incremental passes every
+# AUTO_SYNC_INTERVAL_MINUTES (plus the daily full pass when AUTO_SYNC_NIGHTLY_FULL is set)
+AUTO_SYNC_MODE: str = os.getenv("AUTO_SYNC_MODE", "daily").strip().lower()
+AUTO_SYNC_NIGHTLY_FULL: bool = _get_bool(os.getenv("AUTO_SYNC_NIGHTLY_FULL", "true"))
+try:
+    AUTO_SYNC_INTERVAL_MINUTES: float = float(os.getenv("AUTO_SYNC_INTERVAL_MINUTES", "10"))
+except ValueError:
+    AUTO_SYNC_INTERVAL_MINUTES = 10.0
+try:
+    AUTO_SYNC_JITTER_SECONDS: float = float(os.getenv("AUTO_SYNC_JITTER_SECONDS", "60"))
+except ValueError:
+    AUTO_SYNC_JITTER_SECONDS = 60.0
+try:
+    AUTO_SYNC_MAX_CHANGES_PER_TICK: int = int(os.getenv("AUTO_SYNC_MAX_CHANGES_PER_TICK", "50"))
+except ValueError:
+    AUTO_SYNC_MAX_CHANGES_PER_TICK = 50
 
 # Log channel
 LOG_CHANNEL_ID: int | None = None
@@ -69,6 +127,20 @@ try:
     SYNC_COOLDOWN_SECONDS: int = int(os.getenv("SYNC_COOLDOWN_SECONDS", "30"))
 except ValueError:
     SYNC_COOLDOWN_SECONDS = 30
+# How long the cached copy of the server whitelist is trusted before diffs/syncs re-read it over RCON
+try:
+    SERVER_WHITELIST_MAX_AGE_SECONDS: float = float(os.getenv("SERVER_WHITELIST_MAX_AGE_SECONDS", "900"))
+except ValueError:
+    SERVER_WHITELIST_MAX_AGE_SECONDS = 900.0
+# The server's own whitelist.json, when the bot shares a host or volume with the Minecraft server.
+# Reads then come from the file instead of `whitelist list`; writes still go through RCON (or, with
+# SERVER_WHITELIST_FILE_WRITES, an edit of the file followed by `whitelist reload`).
+SERVER_WHITELIST_FILE: str = os.getenv("SERVER_WHITELIST_FILE", "").strip()
+SERVER_WHITELIST_FILE_WRITES: bool = _get_bool(os.getenv("SERVER_WHITELIST_FILE_WRITES", "false"))
+try:
+    SERVER_WHITELIST_POLL_SECONDS: float = float(os.getenv("SERVER_WHITELIST_POLL_SECONDS", "5"))
+except ValueError:
+    SERVER_WHITELIST_POLL_SECONDS = 5.0
 
 # Onboarding / verification
 VERIFIED_ROLE_ID: int | None = None
@@ -85,12 +157,80 @@ try:
 except ValueError:
     VERIFY_LOG_CHANNEL_ID = None
 
+# Data store: changes are appended to a journal right away; the JSON snapshot is
+# rewritten (compacted) after this delay or once the journal reaches the threshold
+try:
+    STORE_FLUSH_DELAY_SECONDS: float = float(os.getenv("STORE_FLUSH_DELAY_SECONDS", "60"))
+except ValueError:
+    STORE_FLUSH_DELAY_SECONDS = 60.0
+try:
+    JOURNAL_COMPACT_THRESHOLD: int = int(os.getenv("JOURNAL_COMPACT_THRESHOLD", "500"))
+except ValueError:
+    JOURNAL_COMPACT_THRESHOLD = 500
+JOURNAL_FSYNC: bool = _get_bool(os.getenv("JOURNAL_FSYNC", "true"))
+
+# Storage backend: "json" (data/*.json + journals) or "sql" (DATABASE_URL via SQLAlchemy asyncio)
+STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "json").strip().lower()
+DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///" + os.path.join("data", "aethor.db"))
+
+# Mojang profile lookups
+MOJANG_API_BASE: str = os.getenv("MOJANG_API_BASE", "https://api.mojang.com").rstrip("/")
+MOJANG_SESSION_BASE: str = os.getenv("MOJANG_SESSION_BASE", "https://sessionserver.mojang.com").rstrip("/")
+try:
+    MOJANG_REQUESTS_PER_SECOND: float = float(os.getenv("MOJANG_REQUESTS_PER_SECOND", "5"))
+except ValueError:
+    MOJANG_REQUESTS_PER_SECOND = 5.0
+try:
+    MOJANG_BULK_CONCURRENCY: int = int(os.getenv("MOJANG_BULK_CONCURRENCY", "4"))
+except ValueError:
+    MOJANG_BULK_CONCURRENCY = 4
+try:
+    MOJANG_CACHE_TTL_SECONDS: float = float(os.getenv("MOJANG_CACHE_TTL_SECONDS", "21600"))  # 6h
+except ValueError:
+    MOJANG_CACHE_TTL_SECONDS = 21600.0
+try:
+    MOJANG_NEGATIVE_TTL_SECONDS: float = float(os.getenv("MOJANG_NEGATIVE_TTL_SECONDS", "300"))
+except ValueError:
+    MOJANG_NEGATIVE_TTL_SECONDS = 300.0
+try:
+    MOJANG_CACHE_MAX_ENTRIES: int = int(os.getenv("MOJANG_CACHE_MAX_ENTRIES", "20000"))
+except ValueError:
+    MOJANG_CACHE_MAX_ENTRIES = 20000
+
+# Background IGN refresh: re-resolve linked UUIDs in small batches so renames reach players.json/whitelist
+IGN_REFRESH_ENABLED: bool = _get_bool(os.getenv("IGN_REFRESH_ENABLED", "false"))
+try:
+    IGN_REFRESH_BATCH_SIZE: int = int(os.getenv("IGN_REFRESH_BATCH_SIZE", "50"))
+except ValueError:
+    IGN_REFRESH_BATCH_SIZE = 50
+try:
+    IGN_REFRESH_INTERVAL_SECONDS: float = float(os.getenv("IGN_REFRESH_INTERVAL_SECONDS", "60"))
+except ValueError:
+    IGN_REFRESH_INTERVAL_SECONDS = 60.0
+try:
+    IGN_REFRESH_CYCLE_HOURS: float = float(os.getenv("IGN_REFRESH_CYCLE_HOURS", "24"))
+except ValueError:
+    IGN_REFRESH_CYCLE_HOURS = 24.0
+
 # Backups
 BACKUP_ENABLED: bool = _get_bool(os.getenv("BACKUP_ENABLED", "true"))
 try:
     BACKUP_MAX_KEEP: int = int(os.getenv("BACKUP_MAX_KEEP", "10"))
 except ValueError:
     BACKUP_MAX_KEEP = 10
+# Tiered retention on top of BACKUP_MAX_KEEP: newest snapshot per hour / day / ISO week
+try:
+    BACKUP_KEEP_HOURLY: int = int(os.getenv("BACKUP_KEEP_HOURLY", "24"))
+except ValueError:
+    BACKUP_KEEP_HOURLY = 24
+try:
+    BACKUP_KEEP_DAILY: int = int(os.getenv("BACKUP_KEEP_DAILY", "14"))
+except ValueError:
+    BACKUP_KEEP_DAILY = 14
+try:
+    BACKUP_KEEP_WEEKLY: int = int(os.getenv("BACKUP_KEEP_WEEKLY", "8"))
+except ValueError:
+    BACKUP_KEEP_WEEKLY = 8
 
 # Moderation
 MOD_LOG_CHANNEL_ID: int | None = None
@@ -115,6 +255,9 @@ try:
 except ValueError:
     HEALTHCHECK_PORT = 8080
 
+# Log output: "text" (default) or "json" (one object per line with interaction/guild/command fields)
+LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text").strip().lower()
+
 # File logging
 FILE_LOGS_ENABLED: bool = _get_bool(os.getenv("FILE_LOGS_ENABLED", "true"))
 FILE_LOGS_PATH: str = os.getenv("FILE_LOGS_PATH", os.path.join("logs", "aethor.log"))
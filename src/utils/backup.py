@@ -1,50 +1,250 @@
+import asyncio
 import datetime
-import glob
+import gzip
+import hashlib
 import json
+import logging
 import os
+from typing import Any
 
-from src.config import BACKUP_ENABLED, BACKUP_MAX_KEEP
-from src.utils.store import read_whitelist
+from src.config import (
+    BACKUP_ENABLED,
+    BACKUP_KEEP_DAILY,
+    BACKUP_KEEP_HOURLY,
+    BACKUP_KEEP_WEEKLY,
+    BACKUP_MAX_KEEP,
+)
+from src.utils.journal import CorruptSnapshotError, atomic_write_json
+from src.utils.players import get_directory
+from src.utils.store import get_store
 
 BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
 BACKUP_DIR = os.path.join(BASE_DIR, "backups")
+BLOB_DIR = os.path.join(BACKUP_DIR, "blobs")
+INDEX_PATH = os.path.join(BACKUP_DIR, "index.json")
+
+logger = logging.getLogger("Aethor.backup")
+
+_lock: asyncio.Lock | None = None
 
 
 def ensure_dir() -> None:
-    os.makedirs(BACKUP_DIR, exist_ok=True)
+    os.makedirs(BLOB_DIR, exist_ok=True)
 
 
-def list_backups() -> list[str]:
-    ensure_dir()
-    pattern = os.path.join(BACKUP_DIR, "whitelist-*.json")
-    return sorted(glob.glob(pattern))
+def _encode(data: Any) -> bytes:
+    # Canonical form so identical content always hashes the same regardless of dict order
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
 
 
-def prune_old_backups() -> None:
-    files = list_backups()
-    if BACKUP_MAX_KEEP <= 0:
-        return
-    if len(files) <= BACKUP_MAX_KEEP:
-        return
-    to_delete = files[0 : len(files) - BACKUP_MAX_KEEP]
-    for f in to_delete:
-        try:
-            os.remove(f)
-        except Exception:
-            pass
+def blob_path(digest: str) -> str:
+    return os.path.join(BLOB_DIR, f"{digest}.json.gz")
 
 
-def backup_whitelist() -> str | None:
-    if not BACKUP_ENABLED:
+def _write_blob(payload: bytes) -> str:
+    digest = hashlib.sha256(payload).hexdigest()
+    path = blob_path(digest)
+    if not os.path.exists(path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    return digest
+
+
+def read_blob(digest: str) -> Any:
+    with gzip.open(blob_path(digest), "rb") as f:
+        return json.loads(f.read().decode("utf-8"))
+
+
+def load_index() -> list[dict[str, Any]]:
+    """Manifest of snapshots, oldest first: {"id", "created_at", "reason", "counts", "files": {name: sha256}}."""
+    try:
+        with open(INDEX_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if not isinstance(data, list):
+        return []
+    return [s for s in data if isinstance(s, dict) and isinstance(s.get("files"), dict)]
+
+
+def list_backups() -> list[dict[str, Any]]:
+    return load_index()
+
+
+def find_backup(backup_id: str) -> dict[str, Any] | None:
+    """Look up a snapshot by id, unique id prefix, or "latest"."""
+    index = load_index()
+    if not index:
         return None
+    if backup_id == "latest":
+        return index[-1]
+    matches = [s for s in index if s["id"].startswith(backup_id)]
+    exact = [s for s in matches if s["id"] == backup_id]
+    if exact:
+        return exact[0]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _read_files(snapshot: dict[str, Any]) -> dict[str, Any]:
+    return {name: read_blob(digest) for name, digest in snapshot["files"].items()}
+
+
+async def load_backup(snapshot: dict[str, Any]) -> dict[str, Any]:
+    return await asyncio.get_running_loop().run_in_executor(None, _read_files, snapshot)
+
+
+def live_files() -> dict[str, Any]:
+    return {"whitelist": get_store().snapshot(), "players": get_directory().snapshot()}
+
+
+def _whitelist_names(entries: Any) -> dict[str, str]:
+    out = {}
+    for item in entries if isinstance(entries, list) else []:
+        name = str(item.get("name") or "") if isinstance(item, dict) else str(item)
+        if name.strip():
+            out[name.strip().lower()] = name.strip()
+    return out
+
+
+def diff_files(old: dict[str, Any], new: dict[str, Any]) -> dict[str, list[str]]:
+    """Set difference of two snapshots: whitelist names and Discord links added, removed or changed."""
+    old_wl, new_wl = _whitelist_names(old.get("whitelist")), _whitelist_names(new.get("whitelist"))
+    old_pl, new_pl = old.get("players") or {}, new.get("players") or {}
+    changed = [
+        f"{key}: {old_pl[key].get('name')} -> {new_pl[key].get('name')}"
+        for key in sorted(old_pl.keys() & new_pl.keys())
+        if old_pl[key] != new_pl[key]
+    ]
+    return {
+        "whitelist_added": sorted(new_wl[k] for k in new_wl.keys() - old_wl.keys()),
+        "whitelist_removed": sorted(old_wl[k] for k in old_wl.keys() - new_wl.keys()),
+        "players_added": sorted(f"{k}: {new_pl[k].get('name')}" for k in new_pl.keys() - old_pl.keys()),
+        "players_removed": sorted(f"{k}: {old_pl[k].get('name')}" for k in old_pl.keys() - new_pl.keys()),
+        "players_changed": changed,
+    }
+
+
+def _select_kept(snapshots: list[dict[str, Any]]) -> set[str]:
+    """Newest BACKUP_MAX_KEEP snapshots, plus the newest one per hour/day/ISO week within each tier's window.
+
+    BACKUP_MAX_KEEP <= 0 keeps everything, as it always has.
+    """
+    if BACKUP_MAX_KEEP <= 0:
+        return {s["id"] for s in snapshots}
+    newest_first = sorted(snapshots, key=lambda s: s["created_at"], reverse=True)
+    keep = {s["id"] for s in newest_first[:BACKUP_MAX_KEEP]}
+    tiers = (
+        (BACKUP_KEEP_HOURLY, lambda t: t.strftime("%Y%m%d%H")),
+        (BACKUP_KEEP_DAILY, lambda t: t.strftime("%Y%m%d")),
+        (BACKUP_KEEP_WEEKLY, lambda t: f"{t.isocalendar()[0]}-{t.isocalendar()[1]:02d}"),
+    )
+    for count, bucket_of in tiers:
+        seen: set[str] = set()
+        for snap in newest_first:
+            if len(seen) >= count:
+                break
+            bucket = bucket_of(datetime.datetime.fromisoformat(snap["created_at"]))
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(snap["id"])
+    return keep
+
+
+def _prune(index: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    keep = _select_kept(index)
+    kept = [s for s in index if s["id"] in keep]
+    referenced = {digest for s in kept for digest in s["files"].values()}
+    # Only blobs of dropped snapshots can have become unreferenced; no directory scan needed
+    for snap in index:
+        if snap["id"] in keep:
+            continue
+        for digest in set(snap["files"].values()) - referenced:
+            try:
+                os.remove(blob_path(digest))
+            except OSError:
+                pass
+    return kept
+
+
+def _write_backup(files: dict[str, Any], reason: str, force: bool = False) -> dict[str, Any] | None:
     ensure_dir()
-    now = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-    path = os.path.join(BACKUP_DIR, f"whitelist-{now}.json")
-    try:
-        data = read_whitelist()
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        prune_old_backups()
-        return path
-    except Exception:
+    index = load_index()
+    digests = {name: _write_blob(_encode(data)) for name, data in files.items()}
+    if not force and index and index[-1]["files"] == digests:
+        return None
+    now = datetime.datetime.now()
+    snapshot = {
+        "id": now.strftime("%Y%m%d-%H%M%S-%f"),
+        "created_at": now.isoformat(),
+        "reason": reason,
+        "counts": {name: len(data) for name, data in files.items()},
+        "files": digests,
+    }
+    index.append(snapshot)
+    atomic_write_json(INDEX_PATH, _prune(index))
+    return snapshot
+
+
+async def create_backup(reason: str = "", force: bool = False) -> dict[str, Any] | None:
+    """Snapshot whitelist and player links; returns the new index entry, or None if disabled, unchanged or failed.
+
+    With `force` an entry is written even if nothing changed since the last one (the blobs are shared).
+    """
+    global _lock
+    if not BACKUP_ENABLED:
         return None
+    # Copy the in-memory state on the loop; hashing, compression and disk I/O run in a worker thread
+    files = live_files()
+    if _lock is None:
+        _lock = asyncio.Lock()
+    async with _lock:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, _write_backup, files, reason, force)
+        except Exception as e:
+            logger.warning(f"Backup failed: {e}")
+            return None
+
+
+async def restore_backup(
+    snapshot: dict[str, Any], targets: tuple[str, ...] = ("whitelist", "players")
+) -> tuple[dict[str, int], dict[str, Any]]:
+    """Swap the live stores to a snapshot's content; returns (entries restored, backup of the previous state).
+
+    The current state is backed up first so it can be undone; if that backup cannot be written the restore is
+    refused rather than overwriting data that exists nowhere else.
+    """
+    files = await load_backup(snapshot)
+    if not BACKUP_ENABLED:
+        raise RuntimeError("BACKUP_ENABLED is off, so the current state could not be backed up first")
+    undo = await create_backup(f"pre-restore {snapshot['id']}", force=True)
+    if undo is None:
+        raise RuntimeError("could not back up the current state first (see the log)")
+    # No awaits between the swaps, so other commands never see a half-restored state
+    restored = {}
+    if "whitelist" in targets and "whitelist" in files:
+        get_store().replace(files["whitelist"])
+        restored["whitelist"] = len(files["whitelist"])
+    if "players" in targets and "players" in files:
+        get_directory().replace(files["players"])
+        restored["players"] = len(files["players"])
+    logger.info(f"Restored {', '.join(restored)} from backup {snapshot['id']} (previous state: {undo['id']})")
+    return restored, undo
+
+
+def load_stores() -> None:
+    """Load the JSON stores at startup; a corrupt snapshot is rebuilt from the newest backup plus the journal.
+
+    Raises CorruptSnapshotError when there is no backup to fall back on, so the bot refuses to start instead of
+    compacting a near-empty dataset over the damaged file.
+    """
+    for name, store in (("whitelist", get_store()), ("players", get_directory())):
+        try:
+            store.ensure_loaded()
+        except CorruptSnapshotError as e:
+            snapshot = next((s for s in reversed(load_index()) if name in s["files"]), None)
+            if snapshot is None:
+                raise CorruptSnapshotError(f"{e}; no backup to restore it from") from e
+            store.recover(read_blob(snapshot["files"][name]))
+            logger.error(f"{e}; restored it from backup {snapshot['id']} plus the journal")
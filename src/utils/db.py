@@ -0,0 +1,304 @@
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any
+
+from sqlalchemy import delete, exc, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.config import DATABASE_URL, STORAGE_BACKEND
+from src.utils import mojang
+from src.utils.models import Base, PlayerLink, WhitelistEntry, utcnow
+from src.utils.players import get_directory, normalize_uuid, read_players
+from src.utils.store import get_store
+from src.utils.wl_migrate import backfill_uuids
+
+logger = logging.getLogger("Aethor.db")
+
+_BATCH_SIZE = 500
+_MAX_RETRY_DELAY = 60
+_CLOSE_TIMEOUT = 10
+
+
+class SqlBackend:
+    """Async SQL persistence for the whitelist and player links.
+
+    The in-memory stores stay the read path; mutations are queued here and written in batched transactions.
+    While the database is unreachable, writes stay queued in order and are retried with backoff. stats() reports
+    the backlog in the health check.
+    """
+
+    def __init__(self, url: str):
+        self.engine = create_async_engine(url, pool_pre_ping=True)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self._queue: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self._in_batch = 0
+        self.failing_since: float | None = None
+        self.last_error: str | None = None
+        self.dropped = 0
+
+    async def init(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def load_whitelist(self) -> list[dict[str, Any]]:
+        async with self.sessions() as session:
+            rows = (await session.scalars(select(WhitelistEntry))).all()
+        return [{"name": r.name, "uuid": r.uuid or "", "previous": _split(r.previous)} for r in rows]
+
+    async def load_players(self) -> dict[str, dict[str, Any]]:
+        async with self.sessions() as session:
+            rows = (await session.scalars(select(PlayerLink))).all()
+        return {str(r.discord_id): {"name": r.name, "uuid": r.uuid} for r in rows}
+
+    def submitter(self, table: str):
+        def _submit(op: dict[str, Any]) -> None:
+            self._queue.put_nowait((table, op))
+            if self._worker is None or self._worker.done():
+                self._worker = asyncio.get_running_loop().create_task(self._run(), name="sql-writer")
+
+        return _submit
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty() and len(batch) < _BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+            self._in_batch = len(batch)
+            attempt = 0
+            pending = batch
+            while pending:
+                try:
+                    await self._write(pending)
+                    pending = []
+                except (exc.DataError, exc.IntegrityError) as e:
+                    # The database rejects the data itself; retrying won't help, so find and drop the bad ops
+                    logger.warning(f"SQL write of {len(pending)} ops rejected ({e}); retrying one by one")
+                    pending = await self._write_each(pending)
+                except Exception as e:
+                    # Outage: keep the batch (and everything queued behind it, in order) until it is back
+                    self.last_error = str(e) or type(e).__name__
+                    if self.failing_since is None:
+                        self.failing_since = time.time()
+                    logger.warning(f"SQL write of {len(pending)} ops failed (attempt {attempt + 1}): {e}")
+                    await asyncio.sleep(min(2**attempt, _MAX_RETRY_DELAY))
+                    attempt += 1
+            if self.failing_since is not None:
+                logger.info(f"SQL writes recovered after {time.time() - self.failing_since:.0f}s")
+                self.failing_since = None
+            self._in_batch = 0
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _write(self, batch: list[tuple[str, dict[str, Any]]]) -> None:
+        async with self.sessions.begin() as session:
+            for table, op in batch:
+                await self._apply(session, table, op)
+
+    async def _write_each(self, batch: list[tuple[str, dict[str, Any]]]) -> list[tuple[str, dict[str, Any]]]:
+        """Apply ops one transaction each; drops those the database rejects, returns the rest on an outage."""
+        for i, (table, op) in enumerate(batch):
+            try:
+                await self._write([(table, op)])
+            except (exc.DataError, exc.IntegrityError) as e:
+                self.dropped += 1
+                logger.error(f"Dropped SQL {table} op rejected by the database: {op} ({e})")
+            except Exception:
+                return batch[i:]
+        return []
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": "sql",
+            "pending": self._queue.qsize() + self._in_batch,
+            "failing": self.failing_since is not None,
+            "failing_seconds": round(time.time() - self.failing_since) if self.failing_since else 0,
+            "last_error": self.last_error,
+            "dropped": self.dropped,
+        }
+
+    async def _apply(self, session, table: str, op: dict[str, Any]) -> None:
+        kind = op.get("op")
+        if table == "whitelist":
+            if kind == "add":
+                await self._put_entry(session, op)
+            elif kind == "remove":
+                await session.execute(
+                    delete(WhitelistEntry).where(WhitelistEntry.name_lower == str(op["name"]).lower())
+                )
+            elif kind in ("rename", "uuid"):
+                # Rows stay keyed by name, so a rename moves the row; the UUID and added_at travel with it
+                await self._put_entry(session, op, old=str(op.get("old") or op["name"]))
+            elif kind == "replace":
+                await self._replace_whitelist(session, op["data"])
+        elif table == "players":
+            if kind == "set":
+                name = str(op.get("name") or "")
+                row = await session.get(PlayerLink, int(op["id"]))
+                if row is None:
+                    row = PlayerLink(discord_id=int(op["id"]), name=name, name_lower=name.lower())
+                    session.add(row)
+                # Updating in place keeps linked_at from when the account was first linked
+                row.name, row.name_lower, row.uuid = name, name.lower(), normalize_uuid(op.get("uuid"))
+            elif kind == "delete":
+                await session.execute(delete(PlayerLink).where(PlayerLink.discord_id == int(op["id"])))
+            elif kind == "replace":
+                await self._replace_players(session, op["data"])
+
+    @staticmethod
+    async def _put_entry(session, op: dict[str, Any], old: str | None = None) -> None:
+        name = str(op["name"])
+        existing = await session.get(WhitelistEntry, (old or name).lower())
+        added_at = existing.added_at if existing is not None else utcnow()
+        if existing is not None and existing.name_lower != name.lower():
+            await session.delete(existing)
+            await session.flush()
+            existing = await session.get(WhitelistEntry, name.lower())
+        if existing is None:
+            existing = WhitelistEntry(name_lower=name.lower(), name=name, added_at=added_at)
+            session.add(existing)
+        existing.name = name
+        existing.uuid = normalize_uuid(op.get("uuid")) or None
+        if "previous" in op:
+            existing.previous = ",".join(op["previous"] or []) or None
+
+    @staticmethod
+    async def _replace_whitelist(session, entries: list[Any]) -> None:
+        added = dict((await session.execute(select(WhitelistEntry.name_lower, WhitelistEntry.added_at))).all())
+        await session.execute(delete(WhitelistEntry))
+        now = utcnow()
+        rows: dict[str, dict[str, Any]] = {}
+        # Same shape as the whitelist.json snapshot: bare names or {"name", "uuid"} objects
+        for item in entries:
+            name = str(item.get("name") or "") if isinstance(item, dict) else str(item)
+            uuid = str(item.get("uuid") or "") if isinstance(item, dict) else ""
+            previous = ",".join(item.get("previous") or []) if isinstance(item, dict) else ""
+            if name.strip():
+                rows[name.lower()] = {
+                    "name_lower": name.lower(),
+                    "name": name,
+                    "uuid": normalize_uuid(uuid) or None,
+                    "previous": previous or None,
+                    "added_at": added.get(name.lower(), now),
+                }
+        if rows:
+            await session.execute(insert(WhitelistEntry), list(rows.values()))
+
+    @staticmethod
+    async def _replace_players(session, data: dict[str, dict[str, Any]]) -> None:
+        linked = dict((await session.execute(select(PlayerLink.discord_id, PlayerLink.linked_at))).all())
+        await session.execute(delete(PlayerLink))
+        now = utcnow()
+        rows = [
+            {
+                "discord_id": int(key),
+                "name": str(v.get("name") or ""),
+                "name_lower": str(v.get("name") or "").lower(),
+                "uuid": normalize_uuid(v.get("uuid")),
+                "linked_at": linked.get(int(key), now),
+            }
+            for key, v in data.items()
+            if str(key).isdigit()
+        ]
+        if rows:
+            await session.execute(insert(PlayerLink), rows)
+
+    async def replace_all(self, entries: list[Any], players: dict[str, dict[str, Any]]) -> None:
+        async with self.sessions.begin() as session:
+            await self._replace_whitelist(session, entries)
+            await self._replace_players(session, players)
+
+    async def close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), _CLOSE_TIMEOUT)
+            except TimeoutError:
+                logger.error(f"Shutting down with {self.stats()['pending']} SQL ops still unwritten")
+            self._worker.cancel()
+        await self.engine.dispose()
+
+
+def _split(previous: str | None) -> list[str]:
+    return [p for p in (previous or "").split(",") if p]
+
+
+_backend: SqlBackend | None = None
+
+
+def is_enabled() -> bool:
+    return STORAGE_BACKEND == "sql"
+
+
+def stats() -> dict[str, Any]:
+    return _backend.stats() if _backend is not None else {"backend": "json"}
+
+
+async def attach() -> None:
+    """Load the stores from SQL and route further mutations there (STORAGE_BACKEND=sql)."""
+    global _backend
+    if not is_enabled() or _backend is not None:
+        return
+    backend = SqlBackend(DATABASE_URL)
+    await backend.init()
+    get_store().attach_backend(backend.submitter("whitelist"), await backend.load_whitelist())
+    get_directory().attach_backend(backend.submitter("players"), await backend.load_players())
+    _backend = backend
+    logger.info("Using SQL storage backend")
+
+
+async def close() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+async def migrate_from_json(url: str = DATABASE_URL) -> tuple[int, int]:
+    """One-shot copy of data/whitelist.json and data/players.json (plus journals) into the database."""
+    entries = get_store().snapshot()
+    players = read_players()
+    backend = SqlBackend(url)
+    try:
+        await backend.init()
+        await backend.replace_all(entries, players)
+    finally:
+        await backend.close()
+    return len(entries), len(players)
+
+
+async def _backfill(resolve: bool) -> dict[str, int]:
+    await attach()
+    try:
+        return await backfill_uuids(resolve)
+    finally:
+        await mojang.close()
+        await close()
+        get_store().flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aethor storage tools")
+    parser.add_argument("--migrate", action="store_true", help="Copy the JSON data files into DATABASE_URL.")
+    parser.add_argument("--url", default=DATABASE_URL, help="Database URL (defaults to DATABASE_URL).")
+    parser.add_argument(
+        "--backfill-uuids",
+        action="store_true",
+        help="Attach UUIDs to bare-name whitelist entries (from player links and the server whitelist file).",
+    )
+    parser.add_argument("--resolve", action="store_true", help="With --backfill-uuids, also ask Mojang.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s:%(name)s: %(message)s")
+    if args.migrate:
+        wl_count, player_count = asyncio.run(migrate_from_json(args.url))
+        logger.info(f"Migrated {wl_count} whitelist entries and {player_count} player links to {args.url}")
+    elif args.backfill_uuids:
+        counts = asyncio.run(_backfill(args.resolve))
+        logger.info(f"UUIDs added: {counts}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
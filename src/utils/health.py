@@ -1,56 +1,77 @@
-import json
-import threading
 import time
 from collections.abc import Callable
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from socketserver import ThreadingMixIn
 
+from aiohttp import web
 
-class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
-    daemon_threads = True
+from src.utils import db, metrics, mojang
 
+ROUTES = ("/", "/health", "/healthz", "/ready", "/live")
 
-class _Handler(BaseHTTPRequestHandler):
-    status_func: Callable[[], dict] | None = None
 
-    def _send_json(self, payload: dict, code: int = 200):
-        data = json.dumps(payload).encode("utf-8")
-        self.send_response(code)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(data)))
-        self.end_headers()
-        self.wfile.write(data)
+def _status(request: web.Request) -> dict:
+    status = {"ok": True}
+    status_func = request.app.get("status_func")
+    if status_func:
+        try:
+            status.update(status_func() or {})
+        except Exception as e:  # pragma: no cover
+            status.update({"ok": False, "error": str(e)})
+    return status
+
+
+async def _health(request: web.Request) -> web.Response:
+    return web.json_response(_status(request))
+
+
+async def _metrics(request: web.Request) -> web.Response:
+    return web.Response(body=metrics.render().encode("utf-8"), headers={"Content-Type": metrics.CONTENT_TYPE})
+
 
-    def do_GET(self):
-        if self.path not in ("/", "/health", "/healthz", "/ready", "/live"):
-            self._send_json({"ok": False, "error": "not found"}, code=404)
+async def _not_found(request: web.Request) -> web.Response:
+    return web.json_response({"ok": False, "error": "not found"}, status=404)
+
+
+def _status_collector(status_func: Callable[[], dict]):
+    # Export every numeric field of the health JSON as an aethor_* gauge (nested dicts are flattened with "_")
+    def _collect():
+        def _walk(prefix: str, data: dict):
+            for key, value in data.items():
+                name = f"{prefix}_{key}"
+                if isinstance(value, dict):
+                    yield from _walk(name, value)
+                elif isinstance(value, bool | int | float):
+                    yield name, "gauge", f"Health field {name[len('aethor_'):]}", [({}, float(value))]
+
+        try:
+            yield from _walk("aethor", status_func() or {})
+        except Exception:
             return
-        status = {"ok": True}
-        if _Handler.status_func:
-            try:
-                status.update(_Handler.status_func() or {})
-            except Exception as e:  # pragma: no cover
-                status.update({"ok": False, "error": str(e)})
-        self._send_json(status)
 
-    # Silence default logging to stderr; our app handles logs
-    def log_message(self, format: str, *args):
-        return
+    return _collect
 
 
-def start_health_server(port: int, status_func: Callable[[], dict] | None = None):
-    _Handler.status_func = status_func
-    server = _ThreadingHTTPServer(("0.0.0.0", port), _Handler)
-    thread = threading.Thread(target=server.serve_forever, name="health-server", daemon=True)
-    thread.start()
-    return server, thread
+async def start_health_server(port: int, status_func: Callable[[], dict] | None = None) -> web.AppRunner:
+    """Serve the health and metrics endpoints on the running event loop; stop with `await runner.cleanup()`."""
+    app = web.Application()
+    app["status_func"] = status_func
+    for path in ROUTES:
+        app.router.add_get(path, _health)
+    app.router.add_get("/metrics", _metrics)
+    app.router.add_route("*", "/{tail:.*}", _not_found)
+    if status_func:
+        metrics.add_collector(_status_collector(status_func))
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    return runner
 
 
 def make_status_func(bot, started_at: float) -> Callable[[], dict]:
     def _status() -> dict:
         latency_ms = None
         try:
-            if getattr(bot, "latency", None) is not None:
+            # discord.py reports NaN until the first heartbeat
+            if getattr(bot, "latency", None) is not None and bot.latency == bot.latency:
                 latency_ms = round(bot.latency * 1000, 2)
         except Exception:
             pass
@@ -59,7 +80,12 @@ def make_status_func(bot, started_at: float) -> Callable[[], dict]:
             guilds = len(getattr(bot, "guilds", []) or [])
         except Exception:
             pass
+        storage = db.stats()
         return {
+            # Queued SQL writes that keep failing mean changes exist only in memory
+            "ok": not storage.get("failing"),
+            "storage": storage,
+            "mojang": mojang.stats(),
             "uptime_seconds": int(time.time() - started_at),
             "guilds": guilds,
             "latency_ms": latency_ms,
@@ -0,0 +1,103 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from src.config import IGN_REFRESH_BATCH_SIZE, IGN_REFRESH_CYCLE_HOURS
+from src.utils import metrics
+from src.utils.journal import atomic_write_json
+from src.utils.mojang import fetch_name
+from src.utils.players import get_directory, normalize_uuid
+from src.utils.store import get_store
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "data")
+CHECKPOINT_PATH = os.path.normpath(os.path.join(DATA_DIR, "ign_refresh.json"))
+
+CHECKED = metrics.counter("aethor_ign_refresh_checked_total", "Accounts re-resolved by the IGN refresh job")
+RENAMED = metrics.counter("aethor_ign_refresh_renamed_total", "Renames picked up by the IGN refresh job")
+
+logger = logging.getLogger("Aethor.ign_refresh")
+
+_lock = asyncio.Lock()
+
+
+def load_checkpoint() -> dict[str, Any]:
+    """{"cursor": last UUID done in the current pass ("" = none), "pass_started", "last_completed", counts}."""
+    state = {"cursor": "", "pass_started": 0.0, "last_completed": 0.0, "checked": 0, "renamed": 0}
+    try:
+        with open(CHECKPOINT_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return state
+    if isinstance(data, dict):
+        state.update({k: data[k] for k in state if k in data})
+    return state
+
+
+def _tracked_uuids() -> list[str]:
+    # Linked players plus whitelist entries with a UUID, walked in a stable (sorted) order
+    uuids = {normalize_uuid(r.uuid) for r in get_directory().records() if r.uuid}
+    uuids.update(normalize_uuid(u) for u in get_store().uuids())
+    return sorted(uuids)
+
+
+def _apply_names(names: dict[str, str]) -> int:
+    """Rename linked players and whitelist entries whose account name changed; returns the number of renames."""
+    directory, store = get_directory(), get_store()
+    renamed = 0
+    for uuid, name in names.items():
+        changed = False
+        record = directory.by_uuid(uuid)
+        if record is not None and record.name != name:
+            directory.set(int(record.discord_id), name, record.uuid)
+            changed = True
+        old = store.name_for_uuid(uuid)
+        if old is not None and store.rename(old, name):
+            changed = True
+        renamed += changed
+    return renamed
+
+
+async def run_batch() -> dict[str, Any] | None:
+    """Re-resolve the next IGN_REFRESH_BATCH_SIZE UUIDs; returns the checkpoint, or None while a pass isn't due."""
+    async with _lock:
+        state = load_checkpoint()
+        now = time.time()
+        if not state["cursor"]:
+            if now - state["last_completed"] < IGN_REFRESH_CYCLE_HOURS * 3600:
+                return None
+            state.update(pass_started=now, checked=0, renamed=0)
+
+        uuids = _tracked_uuids()
+        start = bisect.bisect_right(uuids, state["cursor"]) if state["cursor"] else 0
+        batch = uuids[start : start + max(1, IGN_REFRESH_BATCH_SIZE)]
+        results = await asyncio.gather(*(fetch_name(u) for u in batch), return_exceptions=True)
+
+        names: dict[str, str] = {}
+        done = 0
+        for uuid, result in zip(batch, results, strict=True):
+            if isinstance(result, Exception):
+                # Stop at the first failure (usually rate limiting); the next run resumes from here
+                logger.debug(f"Profile lookup for {uuid} failed: {result}")
+                break
+            if result:
+                names[uuid] = result
+            done += 1
+        renamed = _apply_names(names)
+        CHECKED.inc(done)
+        RENAMED.inc(renamed)
+
+        state["checked"] += done
+        state["renamed"] += renamed
+        if done:
+            state["cursor"] = batch[done - 1]
+        if done == len(batch) and start + done >= len(uuids):
+            state.update(cursor="", last_completed=now)
+            logger.info(
+                f"IGN refresh pass finished: {state['checked']} accounts checked, {state['renamed']} renames applied"
+            )
+        atomic_write_json(CHECKPOINT_PATH, state)
+        return state
@@ -0,0 +1,247 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from src.config import JOURNAL_COMPACT_THRESHOLD, JOURNAL_FSYNC, STORE_FLUSH_DELAY_SECONDS
+
+logger = logging.getLogger("Aethor.store")
+
+
+class CorruptSnapshotError(RuntimeError):
+    pass
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    """Write JSON to a temp file, fsync it and rename it over `path` so readers never see a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class Journal:
+    """Append-only JSON-lines log of mutations applied on top of a snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = 0
+        self._file = None
+
+    def append(self, op: dict[str, Any]) -> None:
+        self.append_many([op])
+
+    def append_many(self, ops: list[dict[str, Any]]) -> None:
+        """One write and one fsync for the whole batch; a crash mid-write only tears the last line."""
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(
+            b"".join(json.dumps(op, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n" for op in ops)
+        )
+        self._file.flush()
+        if JOURNAL_FSYNC:
+            os.fsync(self._file.fileno())
+        self.entries += len(ops)
+
+    def replay(self) -> Iterator[dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        torn = False
+        skipped = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A crash mid-append leaves a partial last line; everything before it is intact
+                    torn = True
+                    break
+                good_offset += len(line)
+                self.entries += 1
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    # A damaged line in the middle: skip it rather than losing every op after it
+                    skipped += 1
+                    continue
+                if isinstance(op, dict):
+                    yield op
+        if skipped:
+            logger.error(f"Skipped {skipped} unreadable line(s) in {self.path}")
+        if torn:
+            logger.warning(f"Discarding torn tail of {self.path} at byte {good_offset}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+
+    def reset(self) -> None:
+        self.close()
+        with open(self.path, "wb") as f:
+            os.fsync(f.fileno())
+        self.entries = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JournaledStore:
+    """In-memory dataset persisted as a JSON snapshot plus a mutation journal.
+
+    Subclasses implement _load_snapshot/_snapshot/_apply. Mutations are journaled immediately;
+    the snapshot is rewritten (compacted) after STORE_FLUSH_DELAY_SECONDS, once the journal reaches
+    JOURNAL_COMPACT_THRESHOLD entries, and on shutdown. When an external backend is attached
+    (STORAGE_BACKEND=sql) ops are handed to it instead and the local files are left alone.
+
+    A snapshot that exists but cannot be parsed raises CorruptSnapshotError instead of loading the journal
+    alone, which would compact a near-empty dataset over the damaged file; see recover().
+    """
+
+    empty: Any = None
+
+    def __init__(self, path: str):
+        self.path = path
+        self.journal = Journal(os.path.splitext(path)[0] + ".journal")
+        self.version = 0
+        self._loaded = False
+        self._dirty = False
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._backend: Callable[[dict[str, Any]], None] | None = None
+
+    def _load_snapshot(self, data: Any) -> None:
+        raise NotImplementedError
+
+    def _snapshot(self) -> Any:
+        raise NotImplementedError
+
+    def _apply(self, op: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _read_snapshot(self) -> Any:
+        if not os.path.exists(self.path):
+            return self.empty
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError as e:
+            raise CorruptSnapshotError(f"{self.path} is corrupt ({e})") from e
+
+    def ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._load_snapshot(self._read_snapshot())
+        for op in self.journal.replay():
+            self._apply(op)
+        self._loaded = True
+        if not os.path.exists(self.path):
+            self._dirty = True
+            self.flush()
+
+    def recover(self, data: Any) -> None:
+        """Load `data` (e.g. the newest backup) in place of a corrupt snapshot, then replay the journal on top.
+
+        The damaged file is kept next to the original for inspection.
+        """
+        ts = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.corrupt-{ts}")
+        self._load_snapshot(data)
+        for op in self.journal.replay():
+            self._apply(op)
+        self._loaded = True
+        self._dirty = True
+        self.flush()
+
+    def reset_to(self, data: Any) -> None:
+        """Swap in a whole new dataset (restore, import).
+
+        The current state is compacted first, so the journal never holds ops from before the swap that a
+        crash could replay onto the new data.
+        """
+        self.ensure_loaded()
+        self.flush()
+        self._load_snapshot(data)
+        self.mark_dirty()
+
+    def snapshot(self) -> Any:
+        self.ensure_loaded()
+        return self._snapshot()
+
+    def attach_backend(self, submit: Callable[[dict[str, Any]], None], data: Any) -> None:
+        self._load_snapshot(data)
+        self._loaded = True
+        self._backend = submit
+        self.version += 1
+
+    def record(self, op: dict[str, Any]) -> None:
+        if self._backend is not None:
+            self._backend(op)
+            self.version += 1
+            return
+        self.journal.append(op)
+        self._changed()
+
+    def record_many(self, ops: list[dict[str, Any]]) -> None:
+        """Persist a batch of already-applied ops: one journal append, or one snapshot rewrite if that is cheaper."""
+        if not ops:
+            return
+        if self._backend is not None:
+            for op in ops:
+                self._backend(op)
+            self.version += len(ops)
+            return
+        if self.journal.entries + len(ops) >= JOURNAL_COMPACT_THRESHOLD:
+            # Compaction would follow right away, so skip journaling lines it is about to discard
+            self.version += len(ops)
+            self._dirty = True
+            self.flush()
+            return
+        self.journal.append_many(ops)
+        self.version += len(ops) - 1
+        self._changed()
+
+    def mark_dirty(self) -> None:
+        """For changes too large to journal (full replacement); compacts right away."""
+        self.version += 1
+        if self._backend is not None:
+            self._backend({"op": "replace", "data": self._snapshot()})
+            return
+        self._dirty = True
+        self.flush()
+
+    def _changed(self) -> None:
+        self.version += 1
+        if self.journal.entries >= JOURNAL_COMPACT_THRESHOLD:
+            self.flush()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(STORE_FLUSH_DELAY_SECONDS, self.flush)
+
+    def flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._backend is not None or not self._loaded or (not self._dirty and self.journal.entries == 0):
+            return
+        # Snapshot first, then truncate. A crash in between replays the journal onto a snapshot that already
+        # contains it; add/remove/set are last-writer-wins per key, so that converges. reset_to() compacts
+        # before a wholesale swap, so no op is ever replayed onto data it did not lead to.
+        atomic_write_json(self.path, self._snapshot())
+        self.journal.reset()
+        self._dirty = False
@@ -1,31 +1,123 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 from src.config import (
     FILE_LOGS_BACKUP_COUNT,
     FILE_LOGS_ENABLED,
     FILE_LOGS_MAX_BYTES,
     FILE_LOGS_PATH,
+    LOG_FORMAT,
 )
 
+TEXT_FORMAT = "[%(asctime)s] %(levelname)s:%(name)s: %(message)s"
+CONTEXT_FIELDS = ("interaction_id", "guild_id", "command", "duration_ms")
+
+# Per-task fields (interaction, guild, command) attached to every record logged while they are bound
+log_context: contextvars.ContextVar[dict | None] = contextvars.ContextVar("log_context", default=None)
+
+_listener: QueueListener | None = None
+
+
+@contextmanager
+def bind(**fields):
+    token = log_context.set({**(log_context.get() or {}), **fields})
+    try:
+        yield
+    finally:
+        log_context.reset(token)
+
+
+class _ContextFilter(logging.Filter):
+    # Runs in the thread that logged, before the record is queued, so it still sees that task's context
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in (log_context.get() or {}).items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    """Queues a copy of each record with its message merged but exc_info/stack_info intact.
+
+    The stdlib prepare() folds the traceback into `msg` and clears exc_info, so the listener's formatter could no
+    longer render it on its own (JsonFormatter's "exc_info" field).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Merge the args here: they may be mutated by the caller before the listener thread gets to them
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def _make_formatter() -> logging.Formatter:
+    return JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 def setup_logging(level: int = logging.INFO) -> None:
-    logging.basicConfig(level=level, format="[%(asctime)s] %(levelname)s:%(name)s: %(message)s")
+    """Route all records through a queue; a listener thread does the stream/file I/O off the event loop."""
+    global _listener
+    if _listener is not None:
+        return
+    formatter = _make_formatter()
+    handlers: list[logging.Handler] = [logging.StreamHandler()]
+    file_error = None
 
     if FILE_LOGS_ENABLED:
         try:
             os.makedirs(os.path.dirname(FILE_LOGS_PATH), exist_ok=True)
-            file_handler = RotatingFileHandler(
-                FILE_LOGS_PATH, maxBytes=FILE_LOGS_MAX_BYTES, backupCount=FILE_LOGS_BACKUP_COUNT
+            handlers.append(
+                RotatingFileHandler(FILE_LOGS_PATH, maxBytes=FILE_LOGS_MAX_BYTES, backupCount=FILE_LOGS_BACKUP_COUNT)
             )
-            file_handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s:%(name)s: %(message)s"))
-            root_logger = logging.getLogger()
-            # Avoid adding multiple duplicate handlers if called twice
-            if not any(
-                isinstance(h, RotatingFileHandler) and h.baseFilename == file_handler.baseFilename
-                for h in root_logger.handlers
-            ):
-                root_logger.addHandler(file_handler)
         except Exception as e:  # pragma: no cover
-            logging.getLogger("Aethor").warning(f"Failed to enable file logging: {e}")
+            file_error = e
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    for existing in list(root_logger.handlers):
+        root_logger.removeHandler(existing)
+    root_logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+    if file_error is not None:
+        logging.getLogger("Aethor").warning(f"Failed to enable file logging: {file_error}")
@@ -1,52 +1,109 @@
-from mcstatus import JavaServer
+import time
+from collections.abc import Iterable
 
-from src.config import MC_SERVER
-from src.utils import rcon
+from src.config import MC_SERVER, PRESENCE_POLL_SECONDS
+from src.utils import perf, rcon, resolver
 
 
-def _parse_list_output(raw: str) -> list[str]:
-    # Typical: "There are X of a max of Y players online: name1, name2"
-    if ":" in raw:
-        names = raw.split(":", 1)[1]
-        return [n.strip() for n in names.split(",") if n.strip()]
-    return []
-
-
-async def online_players() -> list[str]:
+@perf.timed("online_players")
+async def fetch_presence() -> tuple[list[str], bool] | None:
+    """(online names, whether that is everyone online), or None when neither RCON nor mcstatus could answer."""
     # Prefer RCON if available for reliability
     if rcon.is_enabled():
         try:
-            raw = rcon.send_command("list")
-            names = _parse_list_output(raw)
-            return names
+            # Typical: "There are X of a max of Y players online: name1, name2"
+            fragments = await rcon.send_command_fragments("list")
+            return list(rcon.iter_list_names(fragments)), True
         except Exception:
             pass
 
     # Fallback to mcstatus
     if not MC_SERVER:
-        return []
+        return None
     try:
-        server = JavaServer.lookup(MC_SERVER)
+        server = await resolver.get_server(MC_SERVER)
         # Try full query first (requires enable-query=true on server)
         try:
             q = await server.async_query()
             if getattr(q.players, "names", None):
-                return [str(n) for n in q.players.names if str(n).strip()]
+                return [str(n) for n in q.players.names if str(n).strip()], True
         except Exception:
-            # If query fails, try status sample (may be incomplete)
+            # If query fails, try status sample: at most ~12 players, and servers may hide it entirely
             status = await server.async_status()
-            sample = getattr(status.players, "sample", None)
-            if sample:
-                return [p.name for p in sample if getattr(p, "name", None)]
+            names = [p.name for p in getattr(status.players, "sample", None) or [] if getattr(p, "name", None)]
+            return names, len(names) >= status.players.online
+        return [], True
     except Exception:
-        pass
-    return []
+        return None
+
+
+async def fetch_online_players() -> list[str] | None:
+    """Current online names (possibly only a sample), or None when neither RCON nor mcstatus could answer."""
+    presence = await fetch_presence()
+    return None if presence is None else presence[0]
+
+
+async def online_players() -> list[str]:
+    return await fetch_online_players() or []
+
+
+class PresenceTracker:
+    """Case-insensitive set of online players, updated by polling and diffed into join/leave sets."""
+
+    def __init__(self):
+        self._online: dict[str, str] = {}  # lowercase name -> name as reported
+        self.updated_at: float | None = None
+
+    @property
+    def age(self) -> float | None:
+        return None if self.updated_at is None else time.monotonic() - self.updated_at
+
+    def names(self) -> list[str]:
+        return sorted(self._online.values(), key=str.lower)
+
+    def is_online(self, name: str) -> bool:
+        return name.strip().lower() in self._online
+
+    def update(self, names: Iterable[str]) -> tuple[list[str], list[str]]:
+        current = {n.lower(): n for n in names if n.strip()}
+        first = self.updated_at is None
+        joined = [current[k] for k in current.keys() - self._online.keys()]
+        left = [self._online[k] for k in self._online.keys() - current.keys()]
+        self._online = current
+        self.updated_at = time.monotonic()
+        # The first poll is a baseline, not a wave of joins
+        return ([], []) if first else (sorted(joined), sorted(left))
+
+
+_tracker = PresenceTracker()
+
+
+def get_tracker() -> PresenceTracker:
+    return _tracker
+
+
+async def poll_presence() -> tuple[list[str], list[str]] | None:
+    """Refresh the tracker; returns (joined, left), or None if the server could not be reached.
+
+    A partial status sample leaves the tracker as it was: everyone missing from it would look like a leave.
+    """
+    presence = await fetch_presence()
+    if presence is None:
+        return None
+    names, complete = presence
+    if not complete:
+        return [], []
+    return _tracker.update(names)
 
 
 async def is_player_online(name: str) -> bool:
     name = name.strip()
     if not name:
         return False
-    names = await online_players()
-    name_lower = name.lower()
-    return any(n.lower() == name_lower for n in names)
+    age = _tracker.age
+    if age is None or age > PRESENCE_POLL_SECONDS * 2:
+        # Tracker not running or stale: ask the server directly. The tracker is left to the poller, which is
+        # what turns its diffs into join/leave events.
+        names = await fetch_online_players() or []
+        return name.lower() in {n.lower() for n in names}
+    return _tracker.is_online(name)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Any
+
+from src.config import MC_SERVER, MC_STATUS_ADDRESSES, MC_STATUS_MAX_AGE_SECONDS
+from src.utils import resolver
+
+_MAX_SNAPSHOTS = 256  # ad-hoc addresses passed to /mcstatus are cached too; keep that bounded
+
+
+class StatusSnapshot:
+    __slots__ = ("address", "checked_at", "error", "fetched_at", "status")
+
+    def __init__(self, address: str, status: Any | None, error: str | None = None):
+        self.address = address
+        self.status = status
+        self.error = error
+        self.fetched_at = time.monotonic()  # when `status` was obtained
+        self.checked_at = self.fetched_at  # when the server was last pinged, successfully or not
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+_snapshots: dict[str, StatusSnapshot] = {}
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def tracked_addresses() -> list[str]:
+    addresses = [MC_SERVER] if MC_SERVER else []
+    return addresses + [a for a in MC_STATUS_ADDRESSES if a not in addresses]
+
+
+async def query_status(address: str):
+    server = await resolver.get_server(address)
+    status = await server.async_status()
+    return status
+
+
+async def _refresh(address: str) -> StatusSnapshot:
+    try:
+        snapshot = StatusSnapshot(address, await query_status(address))
+    except Exception as e:
+        previous = _snapshots.get(address)
+        snapshot = StatusSnapshot(address, None, str(e) or type(e).__name__)
+        if previous is not None and previous.status is not None:
+            # Keep the last good status around; callers can see the error and age
+            snapshot.status = previous.status
+            snapshot.fetched_at = previous.fetched_at
+    _snapshots.pop(address, None)
+    _snapshots[address] = snapshot
+    while len(_snapshots) > _MAX_SNAPSHOTS:
+        del _snapshots[next(iter(_snapshots))]
+    return snapshot
+
+
+async def refresh(address: str) -> StatusSnapshot:
+    # Concurrent callers for the same address share one ping
+    task = _inflight.get(address)
+    if task is None:
+        task = asyncio.get_running_loop().create_task(_refresh(address))
+        _inflight[address] = task
+        task.add_done_callback(lambda _: _inflight.pop(address, None))
+    return await asyncio.shield(task)
+
+
+async def refresh_all() -> None:
+    await asyncio.gather(*(refresh(a) for a in tracked_addresses()))
+
+
+def get_snapshot(address: str) -> StatusSnapshot | None:
+    return _snapshots.get(address)
+
+
+async def get_status(address: str, max_age: float = MC_STATUS_MAX_AGE_SECONDS) -> StatusSnapshot:
+    """Latest snapshot for `address`, pinged live only when missing or last checked over `max_age` ago."""
+    snapshot = _snapshots.get(address)
+    if snapshot is not None and time.monotonic() - snapshot.checked_at <= max_age:
+        return snapshot
+    return await refresh(address)
@@ -0,0 +1,172 @@
+import bisect
+import math
+from collections import deque
+from collections.abc import Callable, Iterable
+
+# Prometheus text exposition (format 0.0.4); no client library, the handful of series we export don't need one
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = tuple[str, dict[str, str], float]  # (series name, labels, value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    if labels:
+        inner = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{inner}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[Sample]:
+        return [(self.name, dict(zip(self.labelnames, key, strict=True)), value) for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS, window=512):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+        self._max: dict[tuple[str, ...], float] = {}
+        # Recent raw observations so percentiles in /perfstats aren't limited to bucket resolution
+        self._recent: dict[tuple[str, ...], deque[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._recent[key] = deque(maxlen=self.window)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+        self._max[key] = max(self._max.get(key, 0.0), value)
+        self._recent[key].append(value)
+
+    def keys(self) -> list[tuple[str, ...]]:
+        return list(self._counts)
+
+    def count(self, key: tuple[str, ...]) -> int:
+        return sum(self._counts.get(key, ()))
+
+    def total(self, key: tuple[str, ...]) -> float:
+        return self._sums.get(key, 0.0)
+
+    def maximum(self, key: tuple[str, ...]) -> float:
+        return self._max.get(key, 0.0)
+
+    def percentile(self, key: tuple[str, ...], q: float) -> float:
+        recent = sorted(self._recent.get(key, ()))
+        if not recent:
+            return 0.0
+        return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+    def samples(self) -> list[Sample]:
+        out: list[Sample] = []
+        for key, counts in self._counts.items():
+            labels = dict(zip(self.labelnames, key, strict=True))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                out.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            out.append((f"{self.name}_sum", labels, self._sums[key]))
+            out.append((f"{self.name}_count", labels, cumulative))
+        return out
+
+
+_collectors: list[Callable[[], Iterable[tuple[str, str, str, list[tuple[dict[str, str], float]]]]]] = []
+_metrics: dict[str, Metric] = {}
+
+
+def register(metric: Metric) -> Metric:
+    """Add a metric to the registry; registering the same name twice returns the existing one."""
+    return _metrics.setdefault(metric.name, metric)
+
+
+def counter(name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+    return register(Counter(name, help_text, labelnames))  # type: ignore[return-value]
+
+
+def gauge(name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return register(Gauge(name, help_text, labelnames))  # type: ignore[return-value]
+
+
+def histogram(name: str, help_text: str, labelnames: Iterable[str] = (), **kwargs) -> Histogram:
+    return register(Histogram(name, help_text, labelnames, **kwargs))  # type: ignore[return-value]
+
+
+def add_collector(func) -> None:
+    """Register a callable evaluated on every scrape, yielding (name, type, help, [(labels, value), ...])."""
+    if func not in _collectors:
+        _collectors.append(func)
+
+
+def remove_collector(func) -> None:
+    if func in _collectors:
+        _collectors.remove(func)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _metrics.values():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(_format_sample(*s) for s in metric.samples())
+    for collect in list(_collectors):
+        for name, kind, help_text, values in collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_format_sample(name, labels, value) for labels, value in values)
+    return "\n".join(lines) + "\n"
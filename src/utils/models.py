@@ -1,6 +1,7 @@
 from datetime import UTC, datetime
 
-from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass
+from sqlalchemy import BigInteger, DateTime, String
+from sqlalchemy.orm import DeclarativeBase, Mapped, MappedAsDataclass, mapped_column
 
 
 def utcnow():
@@ -10,3 +11,26 @@ def utcnow():
 
 class Base(MappedAsDataclass, DeclarativeBase):
     pass
+
+
+class WhitelistEntry(Base):
+    __tablename__ = "whitelist_entries"
+
+    # Minecraft names are case-insensitive; the lowercase form is the key, `name` keeps the casing as added
+    name_lower: Mapped[str] = mapped_column(String(32), primary_key=True)
+    name: Mapped[str] = mapped_column(String(32))
+    # Written undashed (normalize_uuid); 36 also fits the dashed form
+    uuid: Mapped[str | None] = mapped_column(String(36), index=True, default=None)
+    # Comma-separated names the entry was renamed from, oldest first
+    previous: Mapped[str | None] = mapped_column(String(100), default=None)
+    added_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default_factory=utcnow)
+
+
+class PlayerLink(Base):
+    __tablename__ = "player_links"
+
+    discord_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String(32))
+    name_lower: Mapped[str] = mapped_column(String(32), index=True)
+    uuid: Mapped[str] = mapped_column(String(36), index=True, default="")
+    linked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default_factory=utcnow)
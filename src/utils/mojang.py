@@ -1,20 +1,308 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
 import aiohttp
 
-API_URL = "https://api.mojang.com/users/profiles/minecraft/"
+from src.config import (
+    MOJANG_API_BASE,
+    MOJANG_BULK_CONCURRENCY,
+    MOJANG_CACHE_MAX_ENTRIES,
+    MOJANG_CACHE_TTL_SECONDS,
+    MOJANG_NEGATIVE_TTL_SECONDS,
+    MOJANG_REQUESTS_PER_SECOND,
+    MOJANG_SESSION_BASE,
+    STORE_FLUSH_DELAY_SECONDS,
+)
+from src.utils import perf
+from src.utils.journal import atomic_write_json
+from src.utils.ratelimit import AdaptiveRateLimiter
+
+API_URL = MOJANG_API_BASE + "/users/profiles/minecraft/"
+BULK_URL = MOJANG_API_BASE + "/profiles/minecraft"
+PROFILE_URL = MOJANG_SESSION_BASE + "/session/minecraft/profile/"
+BULK_BATCH_SIZE = 10  # Mojang rejects larger bulk requests
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "data")
+CACHE_PATH = os.path.normpath(os.path.join(DATA_DIR, "mojang_cache.json"))
+
+logger = logging.getLogger("Aethor.mojang")
+
+Profile = tuple[str | None, str | None]
+
+
+class ProfileCache:
+    """LRU of lowercase name -> (uuid, exact name) with expiry; (None, None) marks a known-missing name."""
+
+    def __init__(self, path: str, max_entries: int, ttl: float, negative_ttl: float):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # Expiry is wall-clock time so entries stay meaningful across restarts
+        self._data: OrderedDict[str, tuple[str | None, str | None, float]] = OrderedDict()
+        self._loaded = False
+        self._dirty = False
+        self._save_handle: asyncio.TimerHandle | None = None
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        if isinstance(raw, dict):
+            for key, value in raw.items():
+                if isinstance(value, list) and len(value) == 3 and value[2] > now:
+                    self._data[key] = (value[0], value[1], float(value[2]))
+
+    def get(self, name: str) -> Profile | None:
+        self._ensure_loaded()
+        key = name.lower()
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[0], entry[1]
+
+    def put(self, name: str, uuid: str | None, exact: str | None) -> None:
+        self._ensure_loaded()
+        ttl = self.ttl if uuid else self.negative_ttl
+        if ttl <= 0:
+            return
+        expires = time.time() + ttl
+        keys = {name.lower()}
+        if exact:
+            keys.add(exact.lower())
+        for key in keys:
+            self._data[key] = (uuid, exact, expires)
+            self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        self._dirty = True
+        self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(STORE_FLUSH_DELAY_SECONDS, self.save)
+
+    def save(self) -> None:
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not self._dirty:
+            return
+        try:
+            atomic_write_json(self.path, {k: list(v) for k, v in self._data.items()})
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to save Mojang cache: {e}")
+
+
+_cache = ProfileCache(CACHE_PATH, MOJANG_CACHE_MAX_ENTRIES, MOJANG_CACHE_TTL_SECONDS, MOJANG_NEGATIVE_TTL_SECONDS)
+_session: aiohttp.ClientSession | None = None
+_limiter = AdaptiveRateLimiter(MOJANG_REQUESTS_PER_SECOND)
+# Lookups currently on the wire, so concurrent callers for the same name share one request
+_inflight: dict[str, asyncio.Future[Profile]] = {}
+# Normalized UUID -> (current name or None if the account is gone, expiry); in memory only
+_names_by_uuid: dict[str, tuple[str | None, float]] = {}
+_coalesced = 0
+
+MAX_ATTEMPTS = 4
+
+
+class MojangRateLimitError(RuntimeError):
+    pass
+
+
+def get_cache() -> ProfileCache:
+    return _cache
+
+
+def get_session() -> aiohttp.ClientSession:
+    # One keep-alive session for all lookups instead of a TCP+TLS handshake per call
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+    return _session
+
+
+async def close() -> None:
+    global _session
+    _cache.save()
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def stats() -> dict[str, float | int]:
+    return {
+        "queue_depth": _limiter.waiting,
+        "max_queue_depth": _limiter.max_waiting,
+        "inflight_lookups": len(_inflight),
+        "coalesced_lookups": _coalesced,
+        "throttled_responses": _limiter.throttled,
+        "current_rate": round(_limiter.rate, 3),
+    }
 
 
-async def fetch_uuid(name: str) -> tuple[str | None, str | None]:
+def _retry_after(resp: aiohttp.ClientResponse) -> float | None:
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+
+async def _request(method: str, url: str, **kwargs):
+    """Send a rate-limited request, backing off and retrying on 429; returns (status, json body or None)."""
+    for _ in range(MAX_ATTEMPTS):
+        await _limiter.acquire()
+        async with get_session().request(method, url, **kwargs) as resp:
+            if resp.status == 429:
+                _limiter.penalize(_retry_after(resp))
+                continue
+            _limiter.reward()
+            if resp.status == 204 or resp.status == 404:
+                return resp.status, None
+            resp.raise_for_status()
+            return resp.status, await resp.json()
+    raise MojangRateLimitError("Mojang is rate limiting lookups right now. Try again in a minute.")
+
+
+async def _lookup(name: str) -> Profile:
+    url = API_URL + name
+    _, data = await _request("GET", url)
+    if not data:
+        _cache.put(name, None, None)
+        return None, None
+    # data: {"id": "uuid_no_dashes", "name": "ExactName"}
+    uuid = data.get("id")
+    exact = data.get("name")
+    _cache.put(name, uuid, exact)
+    return (uuid, exact)
+
+
+@perf.timed("mojang")
+async def fetch_uuid(name: str) -> Profile:
+    global _coalesced
     name = name.strip()
     if not name:
         return None, None
-    url = API_URL + name
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, timeout=10) as resp:
-            if resp.status == 204 or resp.status == 404:
-                return None, None
-            resp.raise_for_status()
-            data = await resp.json()
-            # data: {"id": "uuid_no_dashes", "name": "ExactName"}
-            uuid = data.get("id")
-            exact = data.get("name")
-            return (uuid, exact)
+    cached = _cache.get(name)
+    if cached is not None:
+        return cached
+    key = name.lower()
+    pending = _inflight.get(key)
+    if pending is not None:
+        _coalesced += 1
+        return await asyncio.shield(pending)
+    task = asyncio.get_running_loop().create_task(_lookup(name))
+    _inflight[key] = task
+    task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+@dataclass
+class BulkResult:
+    resolved: dict[str, tuple[str, str]] = field(default_factory=dict)  # lowercase input -> (uuid, exact name)
+    unknown: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+
+
+async def _fetch_batch(batch: list[str], result: BulkResult) -> None:
+    try:
+        _, data = await _request("POST", BULK_URL, json=batch)
+    except Exception as e:
+        logger.warning(f"Bulk profile lookup failed for {len(batch)} names: {e}")
+        result.failed.extend(batch)
+        return
+    found = {}
+    for item in data if isinstance(data, list) else []:
+        if isinstance(item, dict) and item.get("id") and item.get("name"):
+            found[str(item["name"]).lower()] = (str(item["id"]), str(item["name"]))
+    for name in batch:
+        profile = found.get(name.lower())
+        if profile:
+            result.resolved[name.lower()] = profile
+            _cache.put(name, *profile)
+        else:
+            result.unknown.append(name)
+            _cache.put(name, None, None)
+
+
+async def fetch_uuids_bulk(
+    names: Iterable[str],
+    *,
+    concurrency: int = MOJANG_BULK_CONCURRENCY,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> BulkResult:
+    """Resolve many names via the bulk profile endpoint, 10 per request, using the cache where possible.
+
+    `on_progress(done, total)` is called after each batch with counts of names that needed a request.
+    """
+    result = BulkResult()
+    pending: list[str] = []
+    seen: set[str] = set()
+    for name in names:
+        name = name.strip()
+        if not name or name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        cached = _cache.get(name)
+        if cached is None:
+            pending.append(name)
+        elif cached[0]:
+            result.resolved[name.lower()] = (cached[0], cached[1] or name)
+        else:
+            result.unknown.append(name)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = 0
+
+    async def _run(batch: list[str]) -> None:
+        nonlocal done
+        async with semaphore:
+            await _fetch_batch(batch, result)
+        done += len(batch)
+        if on_progress:
+            on_progress(done, len(pending))
+
+    await asyncio.gather(
+        *(_run(pending[i : i + BULK_BATCH_SIZE]) for i in range(0, len(pending), BULK_BATCH_SIZE))
+    )
+    return result
+
+
+@perf.timed("mojang_profile")
+async def fetch_name(uuid: str) -> str | None:
+    """Current name of the account with this UUID (sessionserver profile lookup), or None if it doesn't exist."""
+    key = uuid.replace("-", "").strip().lower()
+    cached = _names_by_uuid.get(key)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+    _, data = await _request("GET", PROFILE_URL + key)
+    name = str(data["name"]) if isinstance(data, dict) and data.get("name") else None
+    ttl = MOJANG_CACHE_TTL_SECONDS if name else MOJANG_NEGATIVE_TTL_SECONDS
+    _names_by_uuid[key] = (name, time.time() + ttl)
+    if len(_names_by_uuid) > MOJANG_CACHE_MAX_ENTRIES:
+        _names_by_uuid.pop(next(iter(_names_by_uuid)))
+    if name:
+        # Name lookups (e.g. /verify) for the new name can be answered from this
+        _cache.put(name, key, name)
+    return name
@@ -0,0 +1,124 @@
+import bisect
+import math
+from collections.abc import Callable
+
+import discord
+
+# Returns (version, names sorted case-insensitively, their lowercase keys); the version changes on mutation
+NameSource = Callable[[], tuple[int, list[str], list[str]]]
+
+
+def static_source(names: list[str]) -> NameSource:
+    keyed = sorted((n.lower(), n) for n in names)
+    view = (0, [n for _, n in keyed], [k for k, _ in keyed])
+    return lambda: view
+
+
+class _FilterModal(discord.ui.Modal, title="Filter by prefix"):
+    prefix = discord.ui.TextInput(label="Name starts with", required=False, max_length=16)
+
+    def __init__(self, paginator: "NamePaginator"):
+        super().__init__()
+        self.paginator = paginator
+        self.prefix.default = paginator.prefix
+
+    async def on_submit(self, interaction: discord.Interaction) -> None:
+        self.paginator.prefix = str(self.prefix.value or "").strip().lower()
+        self.paginator.page = 0
+        await self.paginator.refresh(interaction)
+
+
+class NamePaginator(discord.ui.View):
+    """Button-driven pages over a sorted name list; pages are slices of the cached snapshot, never a re-read."""
+
+    def __init__(self, title: str, source: NameSource, owner_id: int, prefix: str = "", per_page: int = 50):
+        super().__init__(timeout=300)
+        self.title = title
+        self.source = source
+        self.owner_id = owner_id
+        self.prefix = prefix.strip().lower()
+        self.per_page = per_page
+        self.page = 0
+        self.message: discord.Message | None = None
+        self.interaction: discord.Interaction | None = None
+        self._cache_key: tuple[int, str] | None = None
+        self._matches: list[str] = []
+
+    def _filtered(self) -> list[str]:
+        version, names, keys = self.source()
+        if self._cache_key != (version, self.prefix):
+            if self.prefix:
+                # Keys are sorted, so a prefix is a contiguous range
+                lo = bisect.bisect_left(keys, self.prefix)
+                hi = bisect.bisect_left(keys, self.prefix + "\uffff", lo)
+                self._matches = names[lo:hi]
+            else:
+                self._matches = names
+            self._cache_key = (version, self.prefix)
+        return self._matches
+
+    @property
+    def page_count(self) -> int:
+        return max(1, math.ceil(len(self._filtered()) / self.per_page))
+
+    def render(self) -> discord.Embed:
+        matches = self._filtered()
+        self.page = min(self.page, self.page_count - 1)
+        chunk = matches[self.page * self.per_page : (self.page + 1) * self.per_page]
+        title = f"{self.title} ({len(matches)})" + (f" — starting with '{self.prefix}'" if self.prefix else "")
+        embed = discord.Embed(title=title, description="\n".join(chunk) or "No matching names.", color=0x00AAFF)
+        embed.set_footer(text=f"Page {self.page + 1}/{self.page_count}")
+        self.first_page.disabled = self.prev_page.disabled = self.page == 0
+        self.next_page.disabled = self.last_page.disabled = self.page >= self.page_count - 1
+        return embed
+
+    async def refresh(self, interaction: discord.Interaction) -> None:
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Run the command yourself to browse the list.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self) -> None:
+        for item in self.children:
+            item.disabled = True
+        try:
+            if self.interaction is not None:
+                await self.interaction.edit_original_response(view=self)
+            elif self.message is not None:
+                await self.message.edit(view=self)
+        except Exception:
+            pass
+
+    @discord.ui.button(label="«", style=discord.ButtonStyle.secondary)
+    async def first_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = 0
+        await self.refresh(interaction)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.primary)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await self.refresh(interaction)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await self.refresh(interaction)
+
+    @discord.ui.button(label="»", style=discord.ButtonStyle.secondary)
+    async def last_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = self.page_count - 1
+        await self.refresh(interaction)
+
+    @discord.ui.button(label="Filter", style=discord.ButtonStyle.secondary)
+    async def filter_names(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(_FilterModal(self))
+
+    async def start(self, interaction: discord.Interaction, *, ephemeral: bool = True) -> None:
+        self.interaction = interaction
+        await interaction.response.send_message(embed=self.render(), view=self, ephemeral=ephemeral)
+
+    async def reply_to(self, ctx) -> None:
+        self.message = await ctx.reply(embed=self.render(), view=self)
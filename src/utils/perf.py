@@ -0,0 +1,146 @@
+import functools
+import logging
+import time
+from contextlib import contextmanager
+
+import discord
+from discord import app_commands
+
+from src.utils import metrics
+from src.utils.logger import bind, log_context
+
+COMMAND_LATENCY = metrics.histogram("aethor_command_duration_seconds", "Command handler latency", ("kind", "command"))
+COMMAND_ERRORS = metrics.counter("aethor_command_errors_total", "Commands that raised or failed", ("kind", "command"))
+COMMAND_INFLIGHT = metrics.gauge("aethor_command_inflight", "Commands currently executing", ("kind", "command"))
+
+DEPENDENCY_LATENCY = metrics.histogram(
+    "aethor_dependency_duration_seconds", "Round-trip time of outbound calls", ("dependency",)
+)
+DEPENDENCY_ERRORS = metrics.counter("aethor_dependency_errors_total", "Outbound calls that raised", ("dependency",))
+DEPENDENCY_INFLIGHT = metrics.gauge("aethor_dependency_inflight", "Outbound calls in progress", ("dependency",))
+
+SLOW_COMMAND_SECONDS = 1.0
+
+logger = logging.getLogger("Aethor.perf")
+
+
+def _finish_command(kind: str, command: str, started: float, failed: bool) -> None:
+    duration = time.perf_counter() - started
+    COMMAND_INFLIGHT.dec(kind=kind, command=command)
+    COMMAND_LATENCY.observe(duration, kind=kind, command=command)
+    if failed:
+        COMMAND_ERRORS.inc(kind=kind, command=command)
+    # Slow or failed commands are worth an INFO line; the rest only show up at DEBUG
+    level = logging.INFO if failed or duration >= SLOW_COMMAND_SECONDS else logging.DEBUG
+    label = f"/{command}" if kind == "app" else f"!{command}"
+    outcome = "failed" if failed else "finished"
+    logger.log(level, f"{label} {outcome} in {duration * 1000:.0f}ms", extra={"duration_ms": round(duration * 1000, 1)})
+
+
+@contextmanager
+def track_command(kind: str, command: str):
+    """Time a command body; set `outcome["failed"] = True` on the yielded dict for failures that don't raise."""
+    COMMAND_INFLIGHT.inc(kind=kind, command=command)
+    started = time.perf_counter()
+    outcome = {"failed": False}
+    try:
+        yield outcome
+    except BaseException:
+        outcome["failed"] = True
+        raise
+    finally:
+        _finish_command(kind, command, started, outcome["failed"])
+
+
+def timed(dependency: str):
+    """Decorate an async function so each call is recorded under the given dependency name."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            DEPENDENCY_INFLIGHT.inc(dependency=dependency)
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                DEPENDENCY_ERRORS.inc(dependency=dependency)
+                raise
+            finally:
+                DEPENDENCY_INFLIGHT.dec(dependency=dependency)
+                DEPENDENCY_LATENCY.observe(time.perf_counter() - started, dependency=dependency)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_http(http) -> None:
+    """Record every Discord REST call made through the bot's HTTP client (rate-limit waits included) as "discord".
+
+    Interaction responses and followups go through discord.py's webhook adapter instead and are not covered.
+    """
+    http.request = timed("discord")(http.request)
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """Command tree that times every slash/context-menu command invocation."""
+
+    async def _call(self, interaction) -> None:
+        command = interaction.command
+        if command is None or interaction.type is not discord.InteractionType.application_command:
+            await super()._call(interaction)
+            return
+        name = command.qualified_name if hasattr(command, "qualified_name") else command.name
+        with bind(interaction_id=interaction.id, guild_id=interaction.guild_id, command=name):
+            with track_command("app", name) as outcome:
+                await super()._call(interaction)
+                # Errors raised by the command are handled inside _call and only flagged here
+                outcome["failed"] = interaction.command_failed
+
+
+async def before_prefix_command(ctx) -> None:
+    name = ctx.command.qualified_name
+    guild_id = ctx.guild.id if ctx.guild else None
+    ctx._perf_context = log_context.set({"interaction_id": ctx.message.id, "guild_id": guild_id, "command": name})
+    ctx._perf_started = time.perf_counter()
+    COMMAND_INFLIGHT.inc(kind="prefix", command=name)
+
+
+async def after_prefix_command(ctx) -> None:
+    started = getattr(ctx, "_perf_started", None)
+    if started is None:
+        return
+    _finish_command("prefix", ctx.command.qualified_name, started, ctx.command_failed)
+    log_context.reset(ctx._perf_context)
+
+
+def _label(group: str, key: tuple[str, ...]) -> str:
+    if group == "dependency":
+        return key[0]
+    kind, command = key
+    return f"/{command}" if kind == "app" else f"!{command}"
+
+
+def summary() -> list[dict]:
+    """Per command/dependency latency rows for /perfstats, slowest p95 first."""
+    rows = []
+    for group, hist, errors, inflight in (
+        ("command", COMMAND_LATENCY, COMMAND_ERRORS, COMMAND_INFLIGHT),
+        ("dependency", DEPENDENCY_LATENCY, DEPENDENCY_ERRORS, DEPENDENCY_INFLIGHT),
+    ):
+        for key in hist.keys():
+            labels = dict(zip(hist.labelnames, key, strict=True))
+            rows.append(
+                {
+                    "name": _label(group, key),
+                    "group": group,
+                    "count": hist.count(key),
+                    "errors": int(errors.get(**labels)),
+                    "inflight": int(inflight.get(**labels)),
+                    "p50": hist.percentile(key, 0.5),
+                    "p95": hist.percentile(key, 0.95),
+                    "max": hist.maximum(key),
+                }
+            )
+    rows.sort(key=lambda r: r["p95"], reverse=True)
+    return rows
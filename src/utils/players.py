@@ -1,55 +1,152 @@
-import json
+import atexit
 import os
-from typing import Any
+from typing import Any, ClassVar
+
+from src.utils.journal import JournaledStore
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "data")
 PLAYERS_PATH = os.path.normpath(os.path.join(DATA_DIR, "players.json"))
 
 
-def ensure_files() -> None:
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(PLAYERS_PATH):
-        with open(PLAYERS_PATH, "w", encoding="utf-8") as f:
-            json.dump({}, f)
+def normalize_uuid(uuid: str | None) -> str:
+    return (uuid or "").replace("-", "").strip().lower()
+
+
+class PlayerRecord:
+    __slots__ = ("discord_id", "name", "uuid")
+
+    def __init__(self, discord_id: str, name: str, uuid: str):
+        self.discord_id = discord_id
+        self.name = name
+        self.uuid = uuid
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.name, "uuid": self.uuid}
+
+
+class PlayerDirectory(JournaledStore):
+    """Linked accounts indexed by Discord ID, lowercase IGN and UUID; see JournaledStore for persistence."""
+
+    empty: ClassVar[dict] = {}
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._by_id: dict[str, PlayerRecord] = {}
+        self._by_name: dict[str, PlayerRecord] = {}
+        self._by_uuid: dict[str, PlayerRecord] = {}
+
+    def _index(self, record: PlayerRecord) -> None:
+        self._unindex(record.discord_id)
+        self._by_id[record.discord_id] = record
+        if record.name:
+            self._by_name[record.name.lower()] = record
+        if record.uuid:
+            self._by_uuid[normalize_uuid(record.uuid)] = record
+
+    def _unindex(self, discord_id: str) -> PlayerRecord | None:
+        old = self._by_id.pop(discord_id, None)
+        if old is None:
+            return None
+        # Only drop secondary keys that still point at this record
+        if self._by_name.get(old.name.lower()) is old:
+            del self._by_name[old.name.lower()]
+        if self._by_uuid.get(normalize_uuid(old.uuid)) is old:
+            del self._by_uuid[normalize_uuid(old.uuid)]
+        return old
+
+    def _load_snapshot(self, data: Any) -> None:
+        self._by_id, self._by_name, self._by_uuid = {}, {}, {}
+        if not isinstance(data, dict):
+            return
+        for key, value in data.items():
+            if isinstance(value, dict):
+                self._index(PlayerRecord(str(key), str(value.get("name") or ""), str(value.get("uuid") or "")))
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {key: record.to_dict() for key, record in self._by_id.items()}
+
+    def _apply(self, op: dict[str, Any]) -> None:
+        key = str(op.get("id", ""))
+        if op.get("op") == "set":
+            self._index(PlayerRecord(key, str(op.get("name") or ""), str(op.get("uuid") or "")))
+        elif op.get("op") == "delete":
+            self._unindex(key)
+
+    def __len__(self) -> int:
+        self.ensure_loaded()
+        return len(self._by_id)
+
+    def by_id(self, discord_id: int | str) -> PlayerRecord | None:
+        self.ensure_loaded()
+        return self._by_id.get(str(discord_id))
+
+    def by_name(self, name: str) -> PlayerRecord | None:
+        self.ensure_loaded()
+        return self._by_name.get(name.strip().lower())
+
+    def by_uuid(self, uuid: str) -> PlayerRecord | None:
+        self.ensure_loaded()
+        return self._by_uuid.get(normalize_uuid(uuid))
+
+    def records(self) -> list[PlayerRecord]:
+        self.ensure_loaded()
+        return list(self._by_id.values())
+
+    def set(self, discord_id: int, name: str, uuid: str | None) -> None:
+        self.ensure_loaded()
+        op = {"op": "set", "id": str(discord_id), "name": name, "uuid": uuid or ""}
+        self._apply(op)
+        self.record(op)
+
+    def delete(self, discord_id: int) -> bool:
+        key = str(discord_id)
+        if self.by_id(key) is None:
+            return False
+        op = {"op": "delete", "id": key}
+        self._apply(op)
+        self.record(op)
+        return True
+
+    def replace(self, data: dict[str, Any]) -> None:
+        self.reset_to(data)
+
+
+_directory = PlayerDirectory(PLAYERS_PATH)
+atexit.register(_directory.flush)
+
+
+def get_directory() -> PlayerDirectory:
+    return _directory
+
+
+def flush_players() -> None:
+    _directory.flush()
 
 
 def read_players() -> dict[str, Any]:
-    ensure_files()
-    with open(PLAYERS_PATH, encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-        except Exception:
-            data = {}
-    if not isinstance(data, dict):
-        return {}
-    return data
+    return _directory.snapshot()
 
 
 def write_players(data: dict[str, Any]) -> None:
-    ensure_files()
-    with open(PLAYERS_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    _directory.replace(data)
 
 
 def set_player(discord_id: int, name: str, uuid: str | None) -> None:
-    data = read_players()
-    data[str(discord_id)] = {
-        "name": name,
-        "uuid": uuid or "",
-    }
-    write_players(data)
+    _directory.set(discord_id, name, uuid)
 
 
 def get_player(discord_id: int) -> dict[str, Any] | None:
-    data = read_players()
-    return data.get(str(discord_id))
+    record = _directory.by_id(discord_id)
+    return record.to_dict() if record else None
+
+
+def find_by_name(name: str) -> PlayerRecord | None:
+    return _directory.by_name(name)
+
+
+def find_by_uuid(uuid: str) -> PlayerRecord | None:
+    return _directory.by_uuid(uuid)
 
 
 def delete_player(discord_id: int) -> bool:
-    data = read_players()
-    key = str(discord_id)
-    if key in data:
-        data.pop(key)
-        write_players(data)
-        return True
-    return False
+    return _directory.delete(discord_id)
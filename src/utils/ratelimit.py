@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Token bucket shared by coroutines; a non-positive rate disables limiting."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = float(rate)
+        self.burst = max(1, burst if burst is not None else int(rate) or 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Token bucket that halves its rate on 429s (honouring Retry-After) and creeps back up on success."""
+
+    def __init__(self, rate: float, burst: int | None = None, min_rate: float = 0.2):
+        super().__init__(rate, burst)
+        self.base_rate = self.rate
+        self.min_rate = min(min_rate, self.rate) if self.rate > 0 else 0.0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.throttled = 0
+        self._blocked_until = 0.0
+
+    async def acquire(self) -> None:
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            delay = self._blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await super().acquire()
+        finally:
+            self.waiting -= 1
+
+    def penalize(self, retry_after: float | None = None) -> None:
+        self.throttled += 1
+        if self.rate > 0:
+            self.rate = max(self.min_rate, self.rate / 2)
+        backoff = retry_after if retry_after is not None else 1.0 / max(self.rate, self.min_rate or 1.0)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + backoff)
+        # Drop saved-up burst so waiters resume at the reduced pace
+        self._tokens = min(self._tokens, 0.0)
+        self._updated = time.monotonic()
+
+    def reward(self) -> None:
+        if 0 < self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
@@ -1,42 +1,402 @@
-from mcrcon import MCRcon
+import asyncio
+import codecs
+import itertools
+import logging
+import struct
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
 
-from src.config import RCON_ENABLED, RCON_HOST, RCON_PASSWORD, RCON_PORT
+from src.config import (
+    RCON_ENABLED,
+    RCON_HOST,
+    RCON_MAX_COMMANDS_PER_SECOND,
+    RCON_PASSWORD,
+    RCON_PIPELINE_WINDOW,
+    RCON_POOL_SIZE,
+    RCON_PORT,
+    RCON_TIMEOUT_SECONDS,
+)
+from src.utils import perf
+from src.utils.ratelimit import RateLimiter
+
+# Packet types from the Source RCON protocol used by Minecraft
+SERVERDATA_RESPONSE_VALUE = 0
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_AUTH = 3
+# Servers split replies into packets of this many bytes of body
+MAX_FRAGMENT_SIZE = 4096
+
+logger = logging.getLogger("Aethor.rcon")
+
+
+class RconError(RuntimeError):
+    pass
+
+
+class RconAuthError(RconError):
+    pass
+
+
+def _encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = struct.pack("<ii", request_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+
+class RconConnection:
+    def __init__(self, host: str, port: int, password: str, timeout: float = RCON_TIMEOUT_SECONDS):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._ids = itertools.count(1)
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def next_id(self) -> int:
+        # Keep ids positive and within int32; -1 is reserved for auth failure
+        return next(self._ids) & 0x3FFFFFFF or next(self._ids)
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=self.timeout
+        )
+        request_id = self.next_id()
+        await self._send(request_id, SERVERDATA_AUTH, self.password)
+        # Some servers send an empty RESPONSE_VALUE before the auth response; skip it
+        while True:
+            resp_id, resp_type, _ = await self._read_packet()
+            if resp_type == SERVERDATA_EXECCOMMAND or resp_id == -1:
+                break
+        if resp_id == -1:
+            await self.close()
+            raise RconAuthError("RCON authentication failed (check RCON_PASSWORD).")
+
+    async def close(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+    async def _send(self, request_id: int, packet_type: int, body: str) -> None:
+        if self._writer is None:
+            raise RconError("RCON connection is not open.")
+        self._writer.write(_encode_packet(request_id, packet_type, body))
+        await self._writer.drain()
+
+    async def _read_packet(self) -> tuple[int, int, bytes]:
+        if self._reader is None:
+            raise RconError("RCON connection is not open.")
+        header = await asyncio.wait_for(self._reader.readexactly(4), timeout=self.timeout)
+        (length,) = struct.unpack("<i", header)
+        if length < 10:
+            raise RconError(f"Malformed RCON packet (length {length}).")
+        data = await asyncio.wait_for(self._reader.readexactly(length), timeout=self.timeout)
+        request_id, packet_type = struct.unpack("<ii", data[:8])
+        return request_id, packet_type, data[8:-2]
+
+    async def command_fragments(self, cmd: str) -> list[bytes]:
+        request_id = self.next_id()
+        await self._send(request_id, SERVERDATA_EXECCOMMAND, cmd)
+        while True:
+            resp_id, _, body = await self._read_packet()
+            if resp_id == request_id:
+                break
+        if len(body) < MAX_FRAGMENT_SIZE:
+            return [body]
+        # A full fragment means the reply may continue, and split replies carry no end marker. Only now (one
+        # packet per socket read is all vanilla handles) send an empty sentinel: the server answers in order,
+        # so its reply marks the end of the command output.
+        sentinel_id = self.next_id()
+        await self._send(sentinel_id, SERVERDATA_RESPONSE_VALUE, "")
+        fragments = [body]
+        while True:
+            resp_id, _, body = await self._read_packet()
+            if resp_id == request_id:
+                fragments.append(body)
+            elif resp_id == sentinel_id:
+                return fragments
+
+    async def command(self, cmd: str) -> str:
+        return b"".join(await self.command_fragments(cmd)).decode("utf-8", errors="replace")
+
+    async def pipeline(
+        self,
+        cmds: Sequence[tuple[int, str]],
+        results: dict[int, str],
+        *,
+        window: int,
+        limiter: RateLimiter | None = None,
+    ) -> None:
+        # Opt-in (RCON_PIPELINE_WINDOW > 1): keep up to `window` commands awaiting their first response
+        # packet, each tagged with its own request id. Vanilla/Paper read one packet per socket read and drop
+        # the client when several arrive together, so this only suits servers with a stream-based reader.
+        # Completed responses are stored in `results` by caller index so partial progress survives a drop.
+        ids: dict[int, int] = {}
+        awaiting: set[int] = set()
+        fragments: dict[int, list[bytes]] = {}
+        sentinel_id: int | None = None
+        queue = iter(cmds)
+        while True:
+            while sentinel_id is None and len(awaiting) < max(1, window):
+                item = next(queue, None)
+                if item is None:
+                    # Same trailing-sentinel technique as command_fragments() to find the end of the last reply
+                    sentinel_id = self.next_id()
+                    await self._send(sentinel_id, SERVERDATA_RESPONSE_VALUE, "")
+                    break
+                index, cmd = item
+                if limiter is not None:
+                    await limiter.acquire()
+                request_id = self.next_id()
+                ids[request_id] = index
+                awaiting.add(request_id)
+                await self._send(request_id, SERVERDATA_EXECCOMMAND, cmd)
+            resp_id, _, body = await self._read_packet()
+            if resp_id == sentinel_id:
+                break
+            index = ids.get(resp_id)
+            if index is None:
+                continue
+            awaiting.discard(resp_id)
+            fragments.setdefault(index, []).append(body)
+            # Replies arrive in request order, so every earlier command's reply is complete now
+            for done in [i for i in fragments if i != index]:
+                results[done] = b"".join(fragments.pop(done)).decode("utf-8", errors="replace")
+        for index, parts in fragments.items():
+            results[index] = b"".join(parts).decode("utf-8", errors="replace")
+
+
+class RconPool:
+    def __init__(self, host: str, port: int, password: str, size: int = RCON_POOL_SIZE):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.size = max(1, size)
+        self._idle: asyncio.LifoQueue[RconConnection] = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(self.size)
+        self._closed = False
+
+    async def _acquire(self) -> RconConnection:
+        await self._slots.acquire()
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            if conn.connected:
+                return conn
+            await conn.close()
+        conn = RconConnection(self.host, self.port, self.password)
+        try:
+            await conn.connect()
+        except BaseException:
+            self._slots.release()
+            raise
+        return conn
+
+    async def _release(self, conn: RconConnection, *, broken: bool = False) -> None:
+        try:
+            if broken or self._closed or not conn.connected:
+                await conn.close()
+            else:
+                self._idle.put_nowait(conn)
+        finally:
+            self._slots.release()
+
+    async def command(self, cmd: str) -> str:
+        return b"".join(await self.command_fragments(cmd)).decode("utf-8", errors="replace")
+
+    async def command_fragments(self, cmd: str) -> list[bytes]:
+        # One transparent retry: pooled sockets may have been dropped by a server restart
+        for attempt in range(2):
+            conn = await self._acquire()
+            try:
+                resp = await conn.command_fragments(cmd)
+            except (OSError, asyncio.IncompleteReadError, TimeoutError, RconError) as e:
+                await self._release(conn, broken=True)
+                if attempt == 1 or isinstance(e, RconAuthError):
+                    raise
+                logger.info(f"RCON connection lost ({e!r}); reconnecting")
+                continue
+            except BaseException:
+                # Cancelled (cog unload, wait_for) with a reply half read: the socket can't be reused, but the
+                # pool slot must come back or later commands wait forever
+                await self._release(conn, broken=True)
+                raise
+            await self._release(conn)
+            return resp
+        raise RconError("unreachable")
+
+    async def run_many(
+        self, cmds: Sequence[str], *, window: int = 1, limiter: RateLimiter | None = None
+    ) -> list[str | Exception]:
+        if window > 1:
+            return await self._pipeline(cmds, window=window, limiter=limiter)
+        # Strict send-then-await on each connection; concurrency comes from using every pooled connection
+        queue = deque(enumerate(cmds))
+        results: dict[int, str] = {}
+        error: Exception | None = None
+
+        async def _worker() -> None:
+            nonlocal error
+            while queue and error is None:
+                index, cmd = queue.popleft()
+                if limiter is not None:
+                    await limiter.acquire()
+                try:
+                    results[index] = await self.command(cmd)
+                except (OSError, asyncio.IncompleteReadError, TimeoutError, RconError) as e:
+                    # command() already retried once on a fresh socket; the server is unreachable
+                    error = e
+                    logger.info(f"RCON batch stopped after {len(results)}/{len(cmds)} ({e!r})")
+
+        await asyncio.gather(*(_worker() for _ in range(min(self.size, len(cmds)))))
+        missing = error or RconError("No response from server.")
+        return [results[i] if i in results else missing for i in range(len(cmds))]
+
+    async def _pipeline(
+        self, cmds: Sequence[str], *, window: int, limiter: RateLimiter | None = None
+    ) -> list[str | Exception]:
+        results: dict[int, str] = {}
+        error: Exception | None = None
+        # Same single-retry policy as command(); whitelist add/remove are idempotent so resending is safe
+        for _ in range(2):
+            remaining = [(i, cmd) for i, cmd in enumerate(cmds) if i not in results]
+            if not remaining:
+                break
+            try:
+                conn = await self._acquire()
+            except (OSError, TimeoutError, RconError) as e:
+                error = e
+                break
+            try:
+                await conn.pipeline(remaining, results, window=window, limiter=limiter)
+            except (OSError, asyncio.IncompleteReadError, TimeoutError, RconError) as e:
+                await self._release(conn, broken=True)
+                error = e
+                if isinstance(e, RconAuthError):
+                    break
+                logger.info(f"RCON pipeline interrupted after {len(results)}/{len(cmds)} ({e!r})")
+                continue
+            except BaseException:
+                # Cancelled mid-pipeline; see command_fragments()
+                await self._release(conn, broken=True)
+                raise
+            await self._release(conn)
+            error = None
+            break
+        missing = error or RconError("No response from server.")
+        return [results[i] if i in results else missing for i in range(len(cmds))]
+
+    async def close(self) -> None:
+        self._closed = True
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()
+
+
+_pool: RconPool | None = None
 
 
 def is_enabled() -> bool:
     return RCON_ENABLED and RCON_PASSWORD != ""
 
 
-def send_command(cmd: str) -> str:
+def get_pool() -> RconPool:
+    global _pool
+    if _pool is None:
+        _pool = RconPool(RCON_HOST, RCON_PORT, RCON_PASSWORD)
+    return _pool
+
+
+async def close() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+@perf.timed("rcon")
+async def send_command(cmd: str) -> str:
     if not is_enabled():
         raise RuntimeError("RCON is not enabled or missing password.")
-    with MCRcon(RCON_HOST, RCON_PASSWORD, port=RCON_PORT) as mcr:
-        resp = mcr.command(cmd)
-        return resp or ""
+    resp = await get_pool().command(cmd)
+    return resp or ""
 
 
-def whitelist_add(name: str) -> str:
+async def send_many(
+    cmds: Sequence[str],
+    *,
+    window: int = RCON_PIPELINE_WINDOW,
+    rate: float = RCON_MAX_COMMANDS_PER_SECOND,
+) -> list[str | Exception]:
+    """Run commands across the pooled connections (pipelined only if window > 1); one response or exception each."""
+    if not is_enabled():
+        raise RuntimeError("RCON is not enabled or missing password.")
+    if not cmds:
+        return []
+    return await get_pool().run_many(cmds, window=window, limiter=RateLimiter(rate))
+
+
+async def whitelist_add(name: str) -> str:
     name = name.strip()
     if not name:
         raise ValueError("Empty name")
-    return send_command(f"whitelist add {name}")
+    return await send_command(f"whitelist add {name}")
 
 
-def whitelist_remove(name: str) -> str:
+async def whitelist_remove(name: str) -> str:
     name = name.strip()
     if not name:
         raise ValueError("Empty name")
-    return send_command(f"whitelist remove {name}")
+    return await send_command(f"whitelist remove {name}")
 
 
-def whitelist_list() -> list[str]:
-    raw = send_command("whitelist list")
+def iter_list_names(fragments: Iterable[bytes]) -> Iterator[str]:
+    """Stream names out of a `whitelist list`/`list` reply one packet at a time."""
     # Typical response: "There are N whitelisted players: name1, name2"
-    parts = raw.split(":", 1)
-    if len(parts) == 2:
-        names = [n.strip() for n in parts[1].split(",") if n.strip()]
-        return names
     # Some servers may return just comma-separated names
-    if "," in raw:
-        return [n.strip() for n in raw.split(",") if n.strip()]
-    return [raw.strip()] if raw.strip() else []
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    header_done = False
+    pending = ""
+
+    def _tokens(final: bool) -> Iterator[str]:
+        nonlocal pending
+        parts = pending.split(",")
+        pending = "" if final else parts.pop()
+        for part in parts:
+            part = part.strip()
+            # Names never contain spaces; this also drops "There are no whitelisted players"
+            if part and " " not in part:
+                yield part
+
+    for fragment in fragments:
+        pending += decoder.decode(fragment)
+        if not header_done:
+            if ":" in pending:
+                pending = pending.split(":", 1)[1]
+                header_done = True
+            elif len(pending) < 256:
+                continue
+            else:
+                header_done = True
+        yield from _tokens(final=False)
+    pending += decoder.decode(b"", final=True)
+    if not header_done and ":" in pending:
+        pending = pending.split(":", 1)[1]
+    yield from _tokens(final=True)
+
+
+@perf.timed("rcon")
+async def send_command_fragments(cmd: str) -> list[bytes]:
+    if not is_enabled():
+        raise RuntimeError("RCON is not enabled or missing password.")
+    return await get_pool().command_fragments(cmd)
+
+
+async def whitelist_list() -> list[str]:
+    return list(iter_list_names(await send_command_fragments("whitelist list")))
@@ -0,0 +1,139 @@
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+from mcstatus import JavaServer
+
+try:
+    from mcstatus._protocol.io.connection import TCPAsyncSocketConnection
+except ImportError:  # mcstatus < 13
+    from mcstatus.protocol.connection import TCPAsyncSocketConnection
+
+from src.config import DNS_MAX_TTL_SECONDS, DNS_MIN_TTL_SECONDS
+
+DEFAULT_PORT = 25565
+
+logger = logging.getLogger("Aethor.dns")
+
+
+class ResolvedAddress:
+    __slots__ = ("expires_at", "host", "ip", "port", "refresh_at")
+
+    def __init__(self, host: str, port: int, ip: str, ttl: float):
+        ttl = min(max(ttl, DNS_MIN_TTL_SECONDS), DNS_MAX_TTL_SECONDS)
+        now = time.monotonic()
+        self.host = host
+        self.port = port
+        self.ip = ip
+        self.expires_at = now + ttl
+        # Refresh in the background before expiry so callers rarely wait on DNS
+        self.refresh_at = now + ttl * 0.8
+
+
+_cache: dict[str, ResolvedAddress] = {}
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def _split(address: str) -> tuple[str, int | None]:
+    host, sep, port = address.strip().rpartition(":")
+    if sep and port.isdigit() and "]" not in port:
+        return host.strip("[]"), int(port)
+    return address.strip().strip("[]"), None
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+async def _resolve_uncached(address: str) -> ResolvedAddress:
+    host, port = _split(address)
+    ttl = float(DNS_MAX_TTL_SECONDS)
+    if port is None and not _is_ip(host):
+        # Same rule as JavaServer.lookup: SRV only applies when no port was given
+        try:
+            answer = await dns.asyncresolver.resolve(f"_minecraft._tcp.{host}", "SRV")
+            record = answer[0]
+            host, port = str(record.target).rstrip("."), int(record.port)
+            ttl = min(ttl, answer.rrset.ttl)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            pass
+    port = port or DEFAULT_PORT
+    if _is_ip(host):
+        return ResolvedAddress(host, port, host, ttl)
+    try:
+        answer = await dns.asyncresolver.resolve(host, "A")
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        # Names only known to the system resolver (hosts file, mDNS, IPv6-only)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        return ResolvedAddress(host, port, infos[0][4][0], ttl)
+    return ResolvedAddress(host, port, answer[0].address, min(ttl, answer.rrset.ttl))
+
+
+async def _refresh(address: str) -> ResolvedAddress:
+    try:
+        resolved = await _resolve_uncached(address)
+    except (dns.exception.DNSException, OSError) as e:
+        stale = _cache.get(address)
+        if stale is None:
+            raise
+        # Keep serving the last good answer; try again after the minimum TTL
+        logger.warning(f"DNS lookup for {address} failed ({e!r}); using last known {stale.ip}:{stale.port}")
+        stale.refresh_at = stale.expires_at = time.monotonic() + DNS_MIN_TTL_SECONDS
+        return stale
+    _cache[address] = resolved
+    return resolved
+
+
+def _start_refresh(address: str) -> asyncio.Task:
+    task = _inflight.get(address)
+    if task is None:
+        task = asyncio.get_running_loop().create_task(_refresh(address))
+        _inflight[address] = task
+        task.add_done_callback(lambda t: (_inflight.pop(address, None), t.cancelled() or t.exception()))
+    return task
+
+
+async def resolve(address: str) -> ResolvedAddress:
+    """Resolve host[:port] (SRV then A) without blocking the loop, honouring record TTLs."""
+    cached = _cache.get(address)
+    now = time.monotonic()
+    if cached is not None and now < cached.expires_at:
+        if now >= cached.refresh_at:
+            _start_refresh(address)
+        return cached
+    return await asyncio.shield(_start_refresh(address))
+
+
+class ResolvedJavaServer(JavaServer):
+    """JavaServer that connects to an already resolved IP but keeps the hostname in the handshake.
+
+    Proxies route on the handshake host (Velocity/BungeeCord forced hosts, TCPShield), so it has to be the
+    name players connect with rather than the bare IP.
+    """
+
+    def __init__(self, host: str, port: int, ip: str, timeout: float = 3):
+        super().__init__(host, port, timeout=timeout)
+        self.ip = ip
+
+    async def async_status(self, *, tries: int = 3, version: int = 47, ping_token: int | None = None):
+        async with TCPAsyncSocketConnection(self.address._replace(host=self.ip), self.timeout) as connection:
+            return await self._retry_async_status(connection, tries=tries, version=version, ping_token=ping_token)
+
+    async def async_query(self, *, tries: int = 3):
+        # Query is plain UDP with no handshake host, so the IP is all it needs
+        return await JavaServer(self.ip, self.address.port, self.timeout, self.query_port).async_query(tries=tries)
+
+
+async def get_server(address: str, timeout: float = 3) -> JavaServer:
+    """Status/query client for host[:port]: DNS comes from the cache, the handshake keeps the SRV target/host."""
+    resolved = await resolve(address)
+    return ResolvedJavaServer(resolved.host, resolved.port, resolved.ip, timeout=timeout)
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from src.config import SERVER_WHITELIST_MAX_AGE_SECONDS
+from src.utils import rcon, server_wl_file
+from src.utils.players import normalize_uuid
+from src.utils.store import get_store
+
+logger = logging.getLogger("Aethor.server_wl")
+
+
+def outcome(action: str, response: str) -> bool | None:
+    """Whether a `whitelist add/remove` reply means the name is now on the server (None if unrecognised)."""
+    text = response.lower()
+    if "does not exist" in text:
+        return False
+    if action == "add" and ("added" in text or "already whitelisted" in text):
+        return True
+    if action == "remove" and ("removed" in text or "not whitelisted" in text):
+        return False
+    return None
+
+
+class ServerWhitelist:
+    """Cached copy of the server whitelist plus the pending local→server diff, kept up to date incrementally.
+
+    Our own RCON writes and local store mutations are applied to the cache as they happen; a full
+    `whitelist list` is only needed when the copy is older than SERVER_WHITELIST_MAX_AGE_SECONDS or a
+    reply shows it had drifted (e.g. someone edited the whitelist in-game). With SERVER_WHITELIST_FILE set the
+    copy comes from the server's whitelist.json instead, re-read whenever its mtime changes, and carries UUIDs.
+
+    Entries are matched by UUID first and by name second, so a renamed player is neither re-added under the
+    new name nor removed under the old one.
+    """
+
+    def __init__(self):
+        self._names: dict[str, str] = {}  # lowercase -> name as reported by the server
+        self._uuids: dict[str, str] = {}  # lowercase -> UUID (file source only)
+        self._by_uuid: dict[str, str] = {}  # normalized UUID -> lowercase server name
+        # Names the server answered "already whitelisted" for while listing them under another (older) name.
+        # RCON listings carry no UUIDs, so this is how a rename is recognised there.
+        self._aliases: set[str] = set()
+        # UUIDs of server names learned from local renames (the store keeps them as each record's previous
+        # names, so they survive a restart), for sources that don't report UUIDs themselves
+        self._hints: dict[str, str] = {}
+        self.version = 0
+        self.fetched_at: float | None = None
+        self.stale = True
+        self.synced_at: float | None = None
+        self.dirty: set[str] = set()  # lowercase names changed locally since the last clean sync
+        self._to_add: dict[str, str] = {}
+        self._to_remove: dict[str, str] = {}
+        self._local_version = -1
+        self._lock = asyncio.Lock()
+
+    # --- server side ---
+
+    @property
+    def loaded(self) -> bool:
+        return self.fetched_at is not None
+
+    @property
+    def age(self) -> float | None:
+        return None if self.fetched_at is None else time.monotonic() - self.fetched_at
+
+    def is_fresh(self) -> bool:
+        wl_file = server_wl_file.get_file()
+        if wl_file is not None:
+            return not self.stale and not wl_file.changed()
+        return not self.stale and self.age is not None and self.age < SERVER_WHITELIST_MAX_AGE_SECONDS
+
+    def names(self) -> list[str]:
+        return sorted(self._names.values(), key=str.lower)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def uuid_of(self, name: str) -> str | None:
+        return self._uuids.get(name.strip().lower())
+
+    async def refresh(self, force: bool = False) -> None:
+        """Re-read the server list (file or RCON) unless the cached copy is still trusted."""
+        if not force and self.is_fresh():
+            return
+        async with self._lock:
+            if not force and self.is_fresh():
+                return
+            if server_wl_file.is_enabled():
+                entries = await server_wl_file.load()
+                names = [e["name"] for e in entries.values()]
+                self._uuids = {key: e["uuid"] for key, e in entries.items() if e["uuid"]}
+            else:
+                names = await rcon.whitelist_list()
+            self._names = {n.lower(): n for n in names}
+            self._hints = {k: u for k, u in self._hints.items() if k in self._names and k not in self._uuids}
+            self._hints.update(self._rename_hints())
+            self._by_uuid = {normalize_uuid(u): k for k, u in [*self._uuids.items(), *self._hints.items()]}
+            if force:
+                self._aliases.clear()
+            self.fetched_at = time.monotonic()
+            self.stale = False
+            self.version += 1
+            self._recompute()
+
+    def _rename_hints(self) -> dict[str, str]:
+        """UUIDs for server names that a local entry with a known UUID was renamed away from."""
+        store = get_store()
+        hints = {}
+        for key in self._names.keys() - self._uuids.keys() - store.entries.keys():
+            current = store.renamed_from(key)
+            uuid = store.uuid_of(current) if current else None
+            if uuid:
+                hints[key] = uuid
+        return hints
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+    def observe(self, action: str, name: str, response: str) -> None:
+        """Fold the reply to one of our `whitelist add/remove` commands into the cache."""
+        if not self.loaded:
+            return  # Nothing to keep in step yet; the first refresh() reads the whole list
+        key = name.strip().lower()
+        present = outcome(action, response)
+        if present is None:
+            logger.debug(f"Unrecognised reply to whitelist {action} {name}: {response!r}; marking stale")
+            self.stale = True
+            return
+        text = response.lower()
+        was_present = key in self._names
+        self.version += 1
+        if "already whitelisted" in text and not was_present:
+            # Listed under another name with the same UUID (a rename), or added behind our back
+            self._aliases.add(key)
+        elif "not whitelisted" in text and was_present:
+            # The server disagreed with our copy, so something else has been editing it
+            self.stale = True
+        elif present:
+            self._names[key] = self._names.get(key, name.strip())
+        linked = None
+        if not present:
+            self._names.pop(key, None)
+            self._aliases.discard(key)
+            uuid = self._uuids.pop(key, None) or self._hints.pop(key, None)
+            if uuid and self._by_uuid.get(normalize_uuid(uuid)) == key:
+                del self._by_uuid[normalize_uuid(uuid)]
+                linked = get_store().name_for_uuid(uuid)  # a local entry that was matched through this one
+        self._update(key, linked)
+
+    # --- local side ---
+
+    def local_changed(self, op: dict[str, Any]) -> None:
+        store = get_store()
+        keys = [str(op.get(field) or "").strip().lower() for field in ("name", "old")]
+        self.dirty.update(k for k in keys if k)
+        old, uuid = keys[1], op.get("uuid")
+        # Server entries under a previous name are only kept while the renamed record exists
+        keys.extend(str(p).strip().lower() for p in op.get("previous") or [] if op.get("op") == "remove")
+        if old and uuid and old in self._names and old not in self._uuids:
+            self._hints[old] = uuid
+            self._by_uuid[normalize_uuid(uuid)] = old
+        if self._local_version != store.version - 1:
+            return  # Already out of step; the next diff() recomputes everything
+        self._local_version = store.version
+        self._update(*keys, self._by_uuid.get(normalize_uuid(uuid)))
+
+    def _on_server(self, key: str) -> bool:
+        """Whether a local entry is already whitelisted on the server, by UUID or by name."""
+        uuid = get_store().uuid_of(key)
+        return key in self._names or key in self._aliases or (bool(uuid) and normalize_uuid(uuid) in self._by_uuid)
+
+    def _on_local(self, key: str) -> bool:
+        """Whether a server entry is still wanted locally, by UUID or by name."""
+        store = get_store()
+        uuid = self._uuids.get(key) or self._hints.get(key)
+        if key in store.entries or store.name_for_uuid(uuid) is not None:
+            return True
+        # A local entry was renamed away from this name: keep it unless the server's UUID shows someone else
+        renamed = store.renamed_from(key)
+        return renamed is not None and not (self._uuids.get(key) and store.uuid_of(renamed))
+
+    def _update(self, *keys: str | None) -> None:
+        local = get_store().entries
+        for key in filter(None, keys):
+            if key in local and not self._on_server(key):
+                self._to_add[key] = local[key]
+            else:
+                self._to_add.pop(key, None)
+            if key in self._names and not self._on_local(key):
+                self._to_remove[key] = self._names[key]
+            else:
+                self._to_remove.pop(key, None)
+
+    def _recompute(self) -> None:
+        store = get_store()
+        self._to_add = {k: n for k, n in store.entries.items() if not self._on_server(k)}
+        self._to_remove = {k: n for k, n in self._names.items() if not self._on_local(k)}
+        self._local_version = store.version
+
+    def diff(self) -> tuple[list[str], list[str]]:
+        """(local names missing on the server, server names missing locally) against the cached copy."""
+        if self._local_version != get_store().version:
+            # Replaced wholesale (restore, backend attach) since we last looked
+            self._recompute()
+        return sorted(self._to_add.values(), key=str.lower), sorted(self._to_remove.values(), key=str.lower)
+
+    def mark_synced(self) -> None:
+        self.dirty.clear()
+        self.synced_at = time.monotonic()
+
+
+_cache = ServerWhitelist()
+get_store().listeners.append(_cache.local_changed)
+
+
+def get_cache() -> ServerWhitelist:
+    return _cache
+
+
+def is_available() -> bool:
+    """Whether the server whitelist can be read at all (over RCON or from its file)."""
+    return rcon.is_enabled() or server_wl_file.is_enabled()
+
+
+async def watch() -> None:
+    """Keep the cache in step with the server's whitelist.json; returns at once if no file is configured."""
+    await server_wl_file.watch(_cache.refresh)
+
+
+async def refresh(force: bool = False) -> ServerWhitelist:
+    await _cache.refresh(force)
+    return _cache
+
+
+async def whitelist_add(name: str) -> str:
+    resp = await rcon.whitelist_add(name)
+    _cache.observe("add", name, resp)
+    return resp
+
+
+async def whitelist_remove(name: str) -> str:
+    resp = await rcon.whitelist_remove(name)
+    _cache.observe("remove", name, resp)
+    return resp
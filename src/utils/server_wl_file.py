@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid as uuidlib
+from collections.abc import Awaitable, Callable, Iterable
+
+from src.config import SERVER_WHITELIST_FILE, SERVER_WHITELIST_FILE_WRITES, SERVER_WHITELIST_POLL_SECONDS
+from src.utils.journal import atomic_write_json
+
+try:
+    from watchfiles import awatch  # optional: inotify/FSEvents instead of polling
+except ImportError:
+    awatch = None
+
+logger = logging.getLogger("Aethor.server_wl_file")
+
+
+def is_enabled() -> bool:
+    return bool(SERVER_WHITELIST_FILE)
+
+
+def writes_enabled() -> bool:
+    return is_enabled() and SERVER_WHITELIST_FILE_WRITES
+
+
+def dashed_uuid(value: str | None) -> str | None:
+    """Mojang's API returns undashed UUIDs; whitelist.json needs the dashed form."""
+    try:
+        return str(uuidlib.UUID(value)) if value else None
+    except ValueError:
+        return None
+
+
+def _stat_key(path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class WhitelistFile:
+    """The server's whitelist.json ({"uuid", "name"} records), re-parsed only when its mtime or size changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.key: tuple[int, int] | None = None
+        self.entries: dict[str, dict[str, str]] = {}  # lowercase name -> {"uuid", "name"}
+
+    def changed(self) -> bool:
+        return _stat_key(self.path) != self.key
+
+    def _parse(self) -> dict[str, dict[str, str]]:
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        entries = {}
+        for item in data if isinstance(data, list) else []:
+            if isinstance(item, dict) and str(item.get("name") or "").strip():
+                name = str(item["name"]).strip()
+                entries[name.lower()] = {"uuid": str(item.get("uuid") or ""), "name": name}
+        return entries
+
+    def load(self, fresh: bool = False) -> dict[str, dict[str, str]]:
+        """Blocking read; call through an executor. Returns the cached parse if the file has not changed."""
+        if fresh:
+            self.key = None  # mtime granularity can hide a rewrite of the same size
+        for attempt in range(3):
+            key = _stat_key(self.path)
+            if key is None:
+                raise FileNotFoundError(f"Server whitelist not found: {self.path}")
+            if key == self.key:
+                return self.entries
+            try:
+                entries = self._parse()
+            except ValueError:
+                # The server rewrites the file in place, so we may have caught it half-written
+                if attempt == 2:
+                    raise
+                time.sleep(0.1)
+                continue
+            self.entries, self.key = entries, key
+            break
+        return self.entries
+
+    def write(self, add: dict[str, str], remove: Iterable[str]) -> None:
+        """Blocking edit: `add` maps names to UUIDs. The server only picks this up after `whitelist reload`."""
+        self.key = None  # Always start from what is on disk now
+        entries = dict(self.load())
+        for name in remove:
+            entries.pop(name.strip().lower(), None)
+        for name, uuid in add.items():
+            entries.setdefault(name.strip().lower(), {"uuid": uuid, "name": name.strip()})
+        atomic_write_json(self.path, list(entries.values()))
+
+
+_file = WhitelistFile(SERVER_WHITELIST_FILE) if SERVER_WHITELIST_FILE else None
+
+
+def get_file() -> WhitelistFile | None:
+    return _file
+
+
+async def load(fresh: bool = False) -> dict[str, dict[str, str]]:
+    if _file is None:
+        raise RuntimeError("SERVER_WHITELIST_FILE is not configured")
+    return await asyncio.get_running_loop().run_in_executor(None, _file.load, fresh)
+
+
+async def write(add: dict[str, str], remove: Iterable[str]) -> None:
+    if _file is None:
+        raise RuntimeError("SERVER_WHITELIST_FILE is not configured")
+    await asyncio.get_running_loop().run_in_executor(None, _file.write, add, list(remove))
+
+
+async def watch(on_change: Callable[[], Awaitable[None]]) -> None:
+    """Call on_change whenever the file changes; uses watchfiles when installed, otherwise polls the mtime."""
+    if _file is None:
+        return
+    if awatch is not None:
+        # Watch the directory: an atomic replace swaps the inode, which a watch on the file itself would lose
+        name = os.path.basename(_file.path)
+        directory = os.path.dirname(os.path.abspath(_file.path))
+        async for _ in awatch(directory, watch_filter=lambda _change, path: os.path.basename(path) == name):
+            await _notify(on_change)
+        return
+    while True:
+        await asyncio.sleep(SERVER_WHITELIST_POLL_SECONDS)
+        if _file.changed():
+            await _notify(on_change)
+
+
+async def _notify(on_change: Callable[[], Awaitable[None]]) -> None:
+    try:
+        await on_change()
+    except Exception as e:
+        logger.warning(f"Reloading {_file.path if _file else 'whitelist file'} failed: {e}")
@@ -1,50 +1,300 @@
-import json
+import atexit
 import os
+from collections.abc import Callable, Iterable
+from typing import Any, ClassVar
+
+from src.utils.journal import JournaledStore
+from src.utils.players import normalize_uuid
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "data")
 WL_PATH = os.path.normpath(os.path.join(DATA_DIR, "whitelist.json"))
+MAX_PREVIOUS_NAMES = 5
+
+
+class WhitelistStore(JournaledStore):
+    """Process-wide whitelist held in memory; see JournaledStore for persistence.
+
+    Entries are {"name", "uuid"} records (bare names until the UUID is known), indexed by lowercase name and
+    by UUID. Adding a name whose UUID is already listed under another name renames that record instead.
+    Renamed records also keep their "previous" names, so the server-side copy under an old name is still
+    recognised as theirs after a restart.
+    """
+
+    empty: ClassVar[list] = []
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._entries: dict[str, str] = {}  # lowercase name -> name as added
+        self._uuids: dict[str, str] = {}  # lowercase name -> Mojang UUID, when known
+        self._by_uuid: dict[str, str] = {}  # normalized UUID -> lowercase name
+        self._previous: dict[str, list[str]] = {}  # lowercase name -> names it was renamed from, oldest first
+        self._renamed_from: dict[str, str] = {}  # lowercase previous name -> lowercase current name
+        self._sorted: list[str] | None = None
+        self._view: tuple[int, list[str], list[str]] | None = None
+        # Called with each add/remove op after it is recorded; full replacements only bump `version`
+        self.listeners: list[Callable[[dict[str, Any]], None]] = []
+
+    def _load_snapshot(self, data: Any) -> None:
+        self._entries, self._uuids, self._by_uuid, self._previous, self._renamed_from = {}, {}, {}, {}, {}
+        self._sorted = None
+        if isinstance(data, list):
+            # Entries are bare names, or {"name", "uuid"[, "previous"]} objects once the UUID has been resolved
+            for item in data:
+                if isinstance(item, dict):
+                    previous = item.get("previous")
+                    self._add_entry(
+                        str(item.get("name") or ""),
+                        str(item.get("uuid") or ""),
+                        [str(p) for p in previous] if isinstance(previous, list) else (),
+                    )
+                else:
+                    self._add_entry(str(item), "")
+
+    def _add_entry(self, name: str, uuid: str, previous: Iterable[str] = ()) -> None:
+        name = name.strip()
+        if not name:
+            return
+        key = name.lower()
+        self._entries.setdefault(key, name)
+        if uuid:
+            self._uuids[key] = uuid
+            self._by_uuid[normalize_uuid(uuid)] = key
+        previous = [p.strip() for p in previous if p.strip() and p.strip().lower() != key][-MAX_PREVIOUS_NAMES:]
+        if previous:
+            self._previous[key] = previous
+            for old in previous:
+                self._renamed_from[old.lower()] = key
+
+    def _drop_entry(self, key: str) -> None:
+        self._entries.pop(key, None)
+        uuid = self._uuids.pop(key, None)
+        if uuid and self._by_uuid.get(normalize_uuid(uuid)) == key:
+            del self._by_uuid[normalize_uuid(uuid)]
+        for old in self._previous.pop(key, []):
+            if self._renamed_from.get(old.lower()) == key:
+                del self._renamed_from[old.lower()]
+
+    def _record(self, name: str) -> Any:
+        key = name.lower()
+        if key not in self._uuids and key not in self._previous:
+            return name
+        record: dict[str, Any] = {"name": name, "uuid": self._uuids.get(key, "")}
+        if key in self._previous:
+            record["previous"] = self._previous[key]
+        return record
+
+    def _snapshot(self) -> list[Any]:
+        return [self._record(name) for name in self.names()]
+
+    def _apply(self, op: dict[str, Any]) -> None:
+        name = str(op.get("name", "")).strip()
+        if not name:
+            return
+        if op.get("op") == "add":
+            self._add_entry(name, str(op.get("uuid") or ""))
+        elif op.get("op") == "remove":
+            self._drop_entry(name.lower())
+        elif op.get("op") == "rename":
+            old = str(op.get("old", "")).strip()
+            previous = op.get("previous")
+            if not isinstance(previous, list):
+                # Journals written before renames carried their history
+                previous = [*self._previous.get(old.lower(), []), old]
+            self._drop_entry(old.lower())
+            self._add_entry(name, str(op.get("uuid") or ""), [str(p) for p in previous])
+        elif op.get("op") == "uuid":
+            # Attach a UUID to an existing entry (migration/backfill); never creates one
+            if name.lower() in self._entries and op.get("uuid"):
+                previous = self._previous.get(name.lower(), [])
+                self._drop_entry(name.lower())
+                self._add_entry(name, str(op["uuid"]), previous)
+        self._sorted = None
+
+    @property
+    def entries(self) -> dict[str, str]:
+        self.ensure_loaded()
+        return self._entries
+
+    def names(self) -> list[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self.entries.values())
+        return self._sorted
+
+    def sorted_view(self) -> tuple[int, list[str], list[str]]:
+        """(version, names sorted case-insensitively, matching lowercase keys); rebuilt only after a mutation."""
+        self.ensure_loaded()
+        if self._view is None or self._view[0] != self.version:
+            keys = sorted(self._entries)
+            self._view = (self.version, [self._entries[k] for k in keys], keys)
+        return self._view
+
+    def __contains__(self, name: str) -> bool:
+        return name.strip().lower() in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def uuid_of(self, name: str) -> str | None:
+        self.ensure_loaded()
+        return self._uuids.get(name.strip().lower())
+
+    def name_for_uuid(self, uuid: str | None) -> str | None:
+        """Lowercase name currently listed for this UUID, if any."""
+        self.ensure_loaded()
+        return self._by_uuid.get(normalize_uuid(uuid)) if uuid else None
+
+    def previous_names(self, name: str) -> list[str]:
+        """Names this entry was renamed from, oldest first."""
+        self.ensure_loaded()
+        return list(self._previous.get(name.strip().lower(), []))
+
+    def renamed_from(self, name: str) -> str | None:
+        """Lowercase name of the entry that was renamed away from `name`, if any."""
+        self.ensure_loaded()
+        return self._renamed_from.get(name.strip().lower())
+
+    def uuids(self) -> list[str]:
+        self.ensure_loaded()
+        return list(self._uuids.values())
+
+    def missing_uuids(self) -> list[str]:
+        self.ensure_loaded()
+        return [name for key, name in self._entries.items() if key not in self._uuids]
 
+    def add(self, name: str, uuid: str | None = None) -> bool:
+        return bool(self.add_many([name], {name.strip().lower(): uuid} if uuid else None))
 
-def ensure_files() -> None:
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(WL_PATH):
-        with open(WL_PATH, "w", encoding="utf-8") as f:
-            json.dump([], f)
+    def add_many(self, names: Iterable[str], uuids: dict[str, str] | None = None) -> list[str]:
+        """Add names not yet present; `uuids` maps lowercase names to their resolved UUIDs.
+
+        A name whose UUID is already listed under an older name renames that entry and is not reported as added.
+        """
+        added = []
+        ops: list[dict[str, Any]] = []
+        for name in names:
+            name = name.strip()
+            if not name or name.lower() in self.entries:
+                continue
+            uuid = (uuids or {}).get(name.lower())
+            old = self.name_for_uuid(uuid)
+            if old is not None:
+                op = self._rename_op(self._entries[old], name)
+                if op is not None:
+                    self._apply(op)
+                    ops.append(op)
+                continue
+            op = {"op": "add", "name": name}
+            if uuid:
+                op["uuid"] = uuid
+            self._apply(op)
+            ops.append(op)
+            added.append(name)
+        # Persisted as one batch: a single journal append (or snapshot rewrite), not a write per name
+        self.record_many(ops)
+        for op in ops:
+            self._notify(op)
+        return added
+
+    def rename(self, old: str, new: str) -> bool:
+        """Move an entry (and its UUID) to a new name, e.g. after the player renamed their account."""
+        op = self._rename_op(old, new)
+        if op is None:
+            return False
+        self._apply(op)
+        self.record(op)
+        self._notify(op)
+        return True
+
+    def _rename_op(self, old: str, new: str) -> dict[str, Any] | None:
+        old_key, new = old.strip().lower(), new.strip()
+        if old_key not in self.entries or not new or (new.lower() in self._entries and new.lower() != old_key):
+            return None
+        if self._entries[old_key] == new:
+            return None
+        previous = [*self._previous.get(old_key, []), self._entries[old_key]]
+        op: dict[str, Any] = {"op": "rename", "name": new, "old": self._entries[old_key]}
+        if old_key in self._uuids:
+            op["uuid"] = self._uuids[old_key]
+        op["previous"] = [p for p in previous if p.lower() != new.lower()][-MAX_PREVIOUS_NAMES:]
+        return op
+
+    def set_uuids(self, uuids: dict[str, str]) -> int:
+        """Attach UUIDs (lowercase name -> UUID) to existing entries in one batch; returns how many changed."""
+        self.ensure_loaded()
+        changed = 0
+        for key, uuid in uuids.items():
+            if key in self._entries and uuid and self._uuids.get(key) != uuid and self.name_for_uuid(uuid) is None:
+                self._apply({"op": "uuid", "name": self._entries[key], "uuid": uuid})
+                changed += 1
+        if changed:
+            # One snapshot rewrite rather than a journal line per entry
+            self.mark_dirty()
+        return changed
+
+    def remove(self, name: str) -> bool:
+        name = name.strip()
+        if name.lower() not in self.entries:
+            return False
+        op: dict[str, Any] = {"op": "remove", "name": name}
+        if self._previous.get(name.lower()):
+            # Lets listeners revisit server entries still listed under an old name
+            op["previous"] = self._previous[name.lower()]
+        self._apply(op)
+        self.record(op)
+        self._notify(op)
+        return True
+
+    def _notify(self, op: dict[str, Any]) -> None:
+        for listener in self.listeners:
+            listener(op)
+
+    def replace(self, names: Iterable[str]) -> None:
+        self.reset_to(list(names))
+
+
+_store = WhitelistStore(WL_PATH)
+atexit.register(_store.flush)
+
+
+def get_store() -> WhitelistStore:
+    return _store
+
+
+def flush_whitelist() -> None:
+    _store.flush()
 
 
 def read_whitelist() -> list[str]:
-    ensure_files()
-    with open(WL_PATH, encoding="utf-8") as f:
-        data = json.load(f)
-        if not isinstance(data, list):
-            return []
-        return [str(x) for x in data]
+    return list(_store.names())
+
+
+def whitelist_view() -> tuple[int, list[str], list[str]]:
+    return _store.sorted_view()
+
+
+def whitelist_count() -> int:
+    return len(_store)
+
+
+def is_whitelisted(name: str) -> bool:
+    return name in _store
 
 
 def write_whitelist(entries: list[str]) -> None:
-    ensure_files()
-    entries = sorted({e.strip() for e in entries if e.strip()})
-    with open(WL_PATH, "w", encoding="utf-8") as f:
-        json.dump(entries, f, ensure_ascii=False, indent=2)
+    _store.replace(entries)
+
+
+def whitelist_uuid(name: str) -> str | None:
+    return _store.uuid_of(name)
+
+
+def add_to_whitelist(name: str, uuid: str | None = None) -> bool:
+    return _store.add(name, uuid)
 
 
-def add_to_whitelist(name: str) -> bool:
-    name = name.strip()
-    if not name:
-        return False
-    wl = read_whitelist()
-    if name in wl:
-        return False
-    wl.append(name)
-    write_whitelist(wl)
-    return True
+def add_many_to_whitelist(names: Iterable[str], uuids: dict[str, str] | None = None) -> list[str]:
+    return _store.add_many(names, uuids)
 
 
 def remove_from_whitelist(name: str) -> bool:
-    name = name.strip()
-    wl = read_whitelist()
-    if name not in wl:
-        return False
-    wl = [x for x in wl if x != name]
-    write_whitelist(wl)
-    return True
+    return _store.remove(name)
@@ -0,0 +1,86 @@
+import asyncio
+import codecs
+import re
+from collections.abc import AsyncIterable, Callable
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from src.utils.mojang import get_session
+
+NAME_RE = re.compile(r"[A-Za-z0-9_]{3,16}")
+# Cells may be separated by commas, semicolons or tabs (CSV/TSV exports) as well as newlines
+_CELL_SPLIT = re.compile(r"[,;\t]")
+
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=120, sock_read=30)
+
+
+@dataclass
+class ImportStats:
+    bytes_read: int = 0
+    lines: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    names: list[str] = field(default_factory=list)
+
+
+class NameStreamParser:
+    """Incrementally decodes bytes and collects valid, de-duplicated IGNs; only a partial line is ever buffered."""
+
+    def __init__(self):
+        self.stats = ImportStats()
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="ignore")
+        self._pending = ""
+        self._seen: set[str] = set()
+
+    def feed(self, chunk: bytes, final: bool = False) -> None:
+        self.stats.bytes_read += len(chunk)
+        text = self._pending + self._decoder.decode(chunk, final=final)
+        lines = text.splitlines()
+        # Keep an unterminated last line for the next chunk
+        self._pending = "" if final or not lines or text.endswith(("\n", "\r")) else lines.pop()
+        self._consume(lines)
+
+    def _consume(self, lines: list[str]) -> None:
+        self.stats.lines += len(lines)
+        cells = [c.strip().strip('"').strip() for line in lines for c in _CELL_SPLIT.split(line)]
+        for cell in filter(None, cells):
+            if not NAME_RE.fullmatch(cell):
+                self.stats.invalid += 1
+                continue
+            key = cell.lower()
+            if key in self._seen:
+                self.stats.duplicates += 1
+                continue
+            self._seen.add(key)
+            self.stats.names.append(cell)
+
+    def close(self) -> ImportStats:
+        self.feed(b"", final=True)
+        return self.stats
+
+
+async def iter_attachment(url: str, max_bytes: int) -> AsyncIterable[bytes]:
+    """Stream an attachment from Discord's CDN in chunks, refusing anything over max_bytes."""
+    received = 0
+    async with get_session().get(url, timeout=DOWNLOAD_TIMEOUT) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            received += len(chunk)
+            if received > max_bytes:
+                raise ValueError(f"File too large (max {max_bytes // (1024 * 1024)}MB).")
+            yield chunk
+
+
+async def parse_stream(
+    chunks: AsyncIterable[bytes], on_progress: Callable[[ImportStats], None] | None = None
+) -> ImportStats:
+    parser = NameStreamParser()
+    async for chunk in chunks:
+        parser.feed(chunk)
+        if on_progress:
+            on_progress(parser.stats)
+        # Parsing a chunk is quick, but yield anyway so a large file never monopolises the loop
+        await asyncio.sleep(0)
+    return parser.close()
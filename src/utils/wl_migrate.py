@@ -0,0 +1,47 @@
+import logging
+
+from src.utils import server_wl_file
+from src.utils.mojang import fetch_uuids_bulk
+from src.utils.players import get_directory
+from src.utils.store import get_store
+
+logger = logging.getLogger("Aethor.wl_migrate")
+
+
+async def backfill_uuids(resolve: bool = False) -> dict[str, int]:
+    """Turn bare-name whitelist entries into {"name", "uuid"} records.
+
+    UUIDs come from linked players and the server's whitelist.json first (no network); with `resolve`, the
+    remainder is looked up through Mojang's bulk endpoint. Each source is committed as one batch.
+    """
+    store = get_store()
+    counts = {"links": 0, "server": 0, "mojang": 0, "unknown": 0}
+    missing = store.missing_uuids()
+    if not missing:
+        return counts
+
+    directory = get_directory()
+    found = {}
+    for name in missing:
+        record = directory.by_name(name)
+        if record is not None and record.uuid:
+            found[name.lower()] = record.uuid
+    counts["links"] = store.set_uuids(found)
+
+    if server_wl_file.is_enabled():
+        try:
+            entries = await server_wl_file.load()
+        except Exception as e:
+            logger.warning(f"Could not read the server whitelist for UUIDs: {e}")
+            entries = {}
+        found = {name.lower(): entries[name.lower()]["uuid"] for name in missing if name.lower() in entries}
+        counts["server"] = store.set_uuids({k: v for k, v in found.items() if v})
+
+    missing = store.missing_uuids()
+    if resolve and missing:
+        result = await fetch_uuids_bulk(missing)
+        counts["mojang"] = store.set_uuids({key: uuid for key, (uuid, _) in result.resolved.items()})
+        counts["unknown"] = len(result.unknown)
+    if any(counts.values()):
+        logger.info(f"Whitelist UUID backfill: {counts}; {len(store.missing_uuids())} entries still without UUID")
+    return counts
@@ -0,0 +1,127 @@
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from src.config import RCON_MAX_COMMANDS_PER_SECOND, RCON_PIPELINE_WINDOW
+from src.utils import rcon, server_wl, server_wl_file
+from src.utils.players import normalize_uuid
+from src.utils.store import get_store
+
+logger = logging.getLogger("Aethor.wl_sync")
+
+
+@dataclass
+class NameResult:
+    name: str
+    action: str  # "add" or "remove"
+    ok: bool
+    response: str
+
+
+@dataclass
+class SyncReport:
+    results: list[NameResult] = field(default_factory=list)
+
+    def _count(self, action: str) -> int:
+        return sum(1 for r in self.results if r.action == action and r.ok)
+
+    def _errors(self, action: str) -> list[str]:
+        return [f"{r.name}: {r.response}" for r in self.results if r.action == action and not r.ok]
+
+    @property
+    def added(self) -> int:
+        return self._count("add")
+
+    @property
+    def removed(self) -> int:
+        return self._count("remove")
+
+    @property
+    def add_errors(self) -> list[str]:
+        return self._errors("add")
+
+    @property
+    def remove_errors(self) -> list[str]:
+        return self._errors("remove")
+
+
+async def apply_changes(
+    to_add: Iterable[str],
+    to_remove: Iterable[str] = (),
+    *,
+    window: int = RCON_PIPELINE_WINDOW,
+    rate: float = RCON_MAX_COMMANDS_PER_SECOND,
+) -> SyncReport:
+    """Apply whitelist additions/removals to the server in one batch spread over the pooled RCON connections."""
+    ops = [("add", n.strip()) for n in to_add if n.strip()]
+    ops += [("remove", n.strip()) for n in to_remove if n.strip()]
+    report = SyncReport()
+    if ops and server_wl_file.writes_enabled() and rcon.is_enabled():
+        # Without RCON there is no `whitelist reload`, and the server would overwrite the edit on its next save
+        ops = await _apply_via_file(ops, report)
+    if not ops:
+        return report
+    responses = await rcon.send_many([f"whitelist {action} {name}" for action, name in ops], window=window, rate=rate)
+    for (action, name), resp in zip(ops, responses, strict=True):
+        if isinstance(resp, Exception):
+            report.results.append(NameResult(name, action, False, str(resp) or type(resp).__name__))
+        else:
+            # The server answers errors as plain replies too ("That player does not exist"); only a reply that
+            # leaves the name in the wanted state counts, and an unrecognised one is reported rather than assumed
+            present = server_wl.outcome(action, resp)
+            ok = present is True if action == "add" else present is False
+            report.results.append(NameResult(name, action, ok, resp))
+            server_wl.get_cache().observe(action, name, resp)
+    return report
+
+
+async def _apply_via_file(ops: list[tuple[str, str]], report: SyncReport) -> list[tuple[str, str]]:
+    """Edit whitelist.json directly and `whitelist reload` once; returns the ops that still need RCON.
+
+    The file needs a UUID per entry, so only names whose UUID we already know can be written this way. Results
+    come from re-reading the file after the reload: if the server saved its own list over our edit in between,
+    the affected names are handed back to be sent as RCON commands instead.
+    """
+    store = get_store()
+    adds: dict[str, str] = {}
+    removes: list[str] = []
+    rest = []
+    for action, name in ops:
+        if action == "remove":
+            removes.append(name)
+        elif uuid := server_wl_file.dashed_uuid(store.uuid_of(name)):
+            adds[name] = uuid
+        else:
+            rest.append((action, name))
+    if not adds and not removes:
+        return rest
+    try:
+        await server_wl_file.write(adds, removes)
+    except Exception as e:
+        logger.warning(f"Could not write the server whitelist file ({e}); using RCON commands instead")
+        return ops
+    try:
+        resp = await rcon.send_command("whitelist reload")
+    except Exception as e:
+        # The file is changed either way; the server applies it on its next reload or restart
+        resp = f"in whitelist.json, but `whitelist reload` failed: {str(e) or type(e).__name__}"
+    # Our own edit changed the file; the next refresh() re-reads it
+    server_wl.get_cache().invalidate()
+    try:
+        entries = await server_wl_file.load(fresh=True)
+    except Exception as e:
+        report.results += [NameResult(name, "add", False, f"{resp}; re-reading failed: {e}") for name in adds]
+        report.results += [NameResult(name, "remove", False, f"{resp}; re-reading failed: {e}") for name in removes]
+        return rest
+    listed = {normalize_uuid(e["uuid"]) for e in entries.values() if e["uuid"]}
+    for name, uuid in adds.items():
+        if name.lower() in entries or normalize_uuid(uuid) in listed:
+            report.results.append(NameResult(name, "add", True, resp))
+        else:
+            rest.append(("add", name))
+    for name in removes:
+        if name.lower() not in entries:
+            report.results.append(NameResult(name, "remove", True, resp))
+        else:
+            rest.append(("remove", name))
+    return rest
@@ -0,0 +1,99 @@
+"""fetch_uuids_bulk against a local stand-in for Mojang's bulk profile endpoint."""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from src.utils import mojang
+from src.utils.ratelimit import AdaptiveRateLimiter
+
+ACCOUNTS = {f"Player{i}": f"{i:032x}" for i in range(25)}
+
+
+class StubMojang:
+    """POST /profiles/minecraft: known names only, at most 10 per request, optionally 429 for the first calls."""
+
+    def __init__(self, throttle: int = 0):
+        self.throttle = throttle
+        self.batches: list[list[str]] = []
+        self.throttled = 0
+
+    async def bulk(self, request: web.Request) -> web.Response:
+        names = await request.json()
+        if len(names) > mojang.BULK_BATCH_SIZE:
+            return web.json_response({"error": "too many names"}, status=400)
+        if self.throttled < self.throttle:
+            self.throttled += 1
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        self.batches.append(names)
+        known = {name.lower(): name for name in ACCOUNTS}
+        return web.json_response(
+            [{"id": ACCOUNTS[known[n.lower()]], "name": known[n.lower()]} for n in names if n.lower() in known]
+        )
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # Fresh cache (outside data/) and limiter per test; both hold state and the limiter binds to one loop
+    monkeypatch.setattr(mojang, "_cache", mojang.ProfileCache(str(tmp_path / "cache.json"), 1000, 3600, 60))
+    monkeypatch.setattr(mojang, "_limiter", AdaptiveRateLimiter(100))
+    # run_bulk() points this at the stub once it knows the port; monkeypatch restores the real URL afterwards
+    monkeypatch.setattr(mojang, "BULK_URL", mojang.BULK_URL)
+
+
+def run_bulk(stub: StubMojang, names: list[str]) -> mojang.BulkResult:
+    async def _run() -> mojang.BulkResult:
+        app = web.Application()
+        app.router.add_post("/profiles/minecraft", stub.bulk)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        # Port 0: the OS picks a free port, so there is no window for another process to take it
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        mojang.BULK_URL = f"http://127.0.0.1:{runner.addresses[0][1]}/profiles/minecraft"
+        try:
+            return await mojang.fetch_uuids_bulk(names)
+        finally:
+            await mojang.close()
+            await runner.cleanup()
+
+    return asyncio.run(_run())
+
+
+def test_batches_of_ten():
+    stub = StubMojang()
+    names = list(ACCOUNTS)
+    result = run_bulk(stub, names)
+    assert sorted(len(b) for b in stub.batches) == [5, 10, 10]
+    assert sorted(n for b in stub.batches for n in b) == sorted(names)
+    assert result.resolved == {name.lower(): (uuid, name) for name, uuid in ACCOUNTS.items()}
+    assert result.unknown == [] and result.failed == []
+
+
+def test_unknown_names_and_casing():
+    stub = StubMojang()
+    result = run_bulk(stub, ["player1", "Nobody", "PLAYER2", "player1", "Ghost_"])
+    # Duplicates (case-insensitive) are sent once; resolved entries carry Mojang's exact casing
+    assert [n for b in stub.batches for n in b] == ["player1", "Nobody", "PLAYER2", "Ghost_"]
+    assert result.resolved == {"player1": (ACCOUNTS["Player1"], "Player1"), "player2": (ACCOUNTS["Player2"], "Player2")}
+    assert sorted(result.unknown) == ["Ghost_", "Nobody"]
+    # Both outcomes are cached, so a repeat needs no request
+    again = StubMojang()
+    assert run_bulk(again, ["Player1", "Nobody"]).unknown == ["Nobody"]
+    assert again.batches == []
+
+
+def test_retries_after_429():
+    stub = StubMojang(throttle=2)
+    result = run_bulk(stub, ["Player3", "Player4"])
+    assert stub.throttled == 2
+    assert set(result.resolved) == {"player3", "player4"}
+    assert mojang.stats()["throttled_responses"] == 2
+
+
+def test_gives_up_after_repeated_429():
+    stub = StubMojang(throttle=mojang.MAX_ATTEMPTS)
+    result = run_bulk(stub, ["Player5", "Player6"])
+    assert stub.batches == []
+    assert sorted(result.failed) == ["Player5", "Player6"]
+    assert result.resolved == {} and result.unknown == []